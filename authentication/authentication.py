@@ -0,0 +1,125 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+TOKEN_VERSION_CLAIM = "ver"
+USER_SNAPSHOT_KEY = "auth:user:{}"
+SNAPSHOT_FIELDS = ("id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+LOCAL_SNAPSHOTS_MAX_SIZE = 10000
+
+_local_snapshots = {}
+_local_lock = threading.Lock()
+
+
+def get_user_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "default")]
+
+
+def token_version(password):
+    """Changes with the password, so the tokens issued before a password change stop being accepted."""
+    return salted_hmac("authentication.token_version", password or "").hexdigest()[:16]
+
+
+def build_user_snapshot(user):
+    snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    snapshot["version"] = token_version(user.password)
+
+    return snapshot
+
+
+def _store_local(user_id, snapshot):
+    with _local_lock:
+        if len(_local_snapshots) >= LOCAL_SNAPSHOTS_MAX_SIZE:
+            _local_snapshots.clear()
+        _local_snapshots[user_id] = (time.monotonic() + getattr(settings, "AUTH_USER_LOCAL_TIMEOUT", 5), snapshot)
+
+
+def store_user_snapshot(user):
+    snapshot = build_user_snapshot(user)
+    get_user_cache().set(
+        USER_SNAPSHOT_KEY.format(user.pk), snapshot, timeout=getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+    )
+    _store_local(user.pk, snapshot)
+
+    return snapshot
+
+
+def load_user_snapshot(user_id):
+    """
+    Returns the snapshot of a user, or ``None`` when it does not exist: from the process-local copy (kept for
+    ``AUTH_USER_LOCAL_TIMEOUT`` seconds), the shared cache (``AUTH_USER_CACHE_TIMEOUT`` seconds) or the database.
+    """
+    local = _local_snapshots.get(user_id)
+    if local is not None and local[0] > time.monotonic():
+        return local[1]
+
+    snapshot = get_user_cache().get(USER_SNAPSHOT_KEY.format(user_id))
+    if snapshot is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        return store_user_snapshot(user) if user is not None else None
+
+    _store_local(user_id, snapshot)
+
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    """Other processes drop their local copy within ``AUTH_USER_LOCAL_TIMEOUT`` seconds."""
+    with _local_lock:
+        _local_snapshots.pop(user_id, None)
+    get_user_cache().delete(USER_SNAPSHOT_KEY.format(user_id))
+
+
+def snapshot_user(snapshot):
+    """
+    A ``User`` built from the snapshot without a query. The other fields (e.g. the password) are deferred:
+    they are loaded on access and ``save()`` only writes the snapshot fields.
+    """
+    user_model = get_user_model()
+
+    return user_model.from_db("default", list(SNAPSHOT_FIELDS), [snapshot[field] for field in SNAPSHOT_FIELDS])
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the token version claim and caches the snapshot of the user, who is about to send requests."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = store_user_snapshot(user)["version"]
+
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` without the per request user query: the user comes from a cached snapshot, checked
+    against the token version claim. Tokens issued without the claim are accepted until they expire.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshot = load_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not snapshot["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        version = validated_token.get(TOKEN_VERSION_CLAIM)
+        if version is not None and version != snapshot["version"]:
+            raise AuthenticationFailed(_("Token is no longer valid"), code="token_not_valid")
+
+        return snapshot_user(snapshot)
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentication.authentication import invalidate_user_snapshot
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """Covers saves, deactivations and password changes; ``QuerySet.update()`` does not send signals."""
+    invalidate_user_snapshot(instance.pk)
+    # A request may cache the old row again before the change commits.
+    transaction.on_commit(lambda: invalidate_user_snapshot(instance.pk))
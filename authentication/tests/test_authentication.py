@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.authentication import TOKEN_VERSION_CLAIM, get_user_cache, invalidate_user_snapshot
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    url = "/authentication/api/users/{}/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+
+        self.api_client = APIClient()
+        tokens = self._get_tokens()
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+
+    def _get_tokens(self):
+        url = "/authentication/api/token/"
+        body = {
+            "username": "test",
+            "password": "123456"
+        }
+
+        return self.api_client.post(path=url, data=body, json=True).data
+
+    def _retrieve(self):
+        return self.api_client.get(path=self.url.format(self.user.id))
+
+    def test_token_version_claim(self):
+        token = AccessToken(self._get_tokens()["access"])
+
+        self.assertIn(TOKEN_VERSION_CLAIM, token)
+
+    def test_user_is_not_queried(self):
+        self._retrieve()
+
+        # Only the retrieved user is queried, not the authenticated one.
+        with self.assertNumQueries(1):
+            api_response = self._retrieve()
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(api_response.data["username"], "test")
+
+    def test_snapshot_is_loaded_from_the_database_once(self):
+        invalidate_user_snapshot(self.user.id)
+
+        with self.assertNumQueries(2):
+            self._retrieve()
+        with self.assertNumQueries(1):
+            self._retrieve()
+
+    def test_deactivated_user(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self._retrieve().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens(self):
+        self.user.set_password("654321")
+        self.user.save()
+
+        self.assertEqual(self._retrieve().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user(self):
+        user_id = self.user.id
+        self.user.delete()
+
+        self.assertEqual(self.api_client.get(path=self.url.format(user_id)).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(get_user_cache().get("auth:user:{}".format(user_id)))
+        self.user = User.objects.create_user(username="test", password="123456")
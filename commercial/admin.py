@@ -10,19 +10,48 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ("id", "user")
+    list_display = ("id", "user", "items_count", "subtotal_price", "total_freight", "total_price")
+    list_select_related = ("user",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("cartitem_set")
 
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "product", "price")
+    list_display = ("id", "product", "price", "quantity")
+
+    def delete_queryset(self, request, queryset):
+        cart_ids = set(queryset.values_list("cart_id", flat=True))
+        super().delete_queryset(request, queryset)
+        Cart.touch(*cart_ids)
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "total_price", "freight")
+    list_display = ("id", "user", "items_count", "subtotal_price", "freight", "total_price")
+    list_select_related = ("user",)
+    readonly_fields = ("subtotal_price", "items_count", "total_price")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.refresh_totals()
 
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "product", "price")
+    list_display = ("id", "product", "price", "quantity")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.order.refresh_totals()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.order.refresh_totals()
+
+    def delete_queryset(self, request, queryset):
+        orders = list(Order.objects.filter(id__in=queryset.values("order_id")))
+        super().delete_queryset(request, queryset)
+        for order in orders:
+            order.refresh_totals()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommercialConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'commercial'
+
+    def ready(self):
+        import commercial.signals  # noqa: F401
@@ -0,0 +1,290 @@
+import http.client
+import json
+import math
+import random
+import subprocess
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+
+from commercial.seeding import ADJECTIVES, NOUNS
+
+WORKLOAD = {
+    "browse": 40,
+    "search": 15,
+    "add_to_cart": 15,
+    "get_cart": 20,
+    "checkout": 10,
+}
+ORDERINGS = ("name", "price", "-price", "-score")
+BROWSE_PAGE_SIZE = 20
+BROWSE_PAGES = 5
+SEARCH_TERMS = tuple(word.lower()[:length] for word in ADJECTIVES + NOUNS for length in (3, len(word)))
+
+
+class InProcessTransport:
+    """Sends the requests to the WSGI application of this process, through Django's test client."""
+
+    def __init__(self):
+        self.local = threading.local()
+        # localhost is allowed with DEBUG on, otherwise the first host allowed by name is used.
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")]
+        self.host = hosts[0] if hosts else "localhost"
+
+    def request(self, method, path, data=None, token=None):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False, HTTP_HOST=self.host)
+
+        extra = {"HTTP_AUTHORIZATION": "Bearer {}".format(token)} if token else {}
+        body = json.dumps(data) if data is not None else ""
+        response = client.generic(method, path, body, content_type="application/json", **extra)
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+
+        return response.status_code, content
+
+    def close(self):
+        connection.close()
+
+
+class HTTPTransport:
+    """Sends the requests to a running server, over one keep-alive connection per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        url = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if token:
+            headers["Authorization"] = "Bearer {}".format(token)
+        body = json.dumps(data) if data is not None else None
+
+        for attempt in range(2):
+            http_connection = getattr(self.local, "connection", None)
+            if http_connection is None:
+                http_connection = self.local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            try:
+                http_connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = http_connection.getresponse()
+                return response.status, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The server may have closed the idle connection, reconnect once.
+                http_connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        http_connection = getattr(self.local, "connection", None)
+        if http_connection is not None:
+            http_connection.close()
+
+
+class VirtualUser:
+    """One shopper of the workload: browses, searches, fills its cart and checks it out."""
+
+    def __init__(self, transport, username, password, user_id, product_ids, rng):
+        self.transport = transport
+        self.username = username
+        self.password = password
+        self.user_id = user_id
+        self.product_ids = product_ids
+        self.random = rng
+        self.token = None
+
+    def request(self, method, path, data=None):
+        return self.transport.request(method, path, data, self.token)
+
+    def login(self):
+        status, content = self.request("POST", "/authentication/api/token/", {
+            "username": self.username,
+            "password": self.password,
+        })
+        if status != 200:
+            raise RuntimeError("Could not log in as {}: {}.".format(self.username, status))
+        self.token = json.loads(content)["access"]
+
+    def browse(self):
+        pages = min(BROWSE_PAGES, math.ceil(len(self.product_ids) / BROWSE_PAGE_SIZE))
+        query = {
+            "page": self.random.randint(1, max(pages, 1)),
+            "page_size": BROWSE_PAGE_SIZE,
+            "ordering": self.random.choice(ORDERINGS),
+        }
+
+        return self.request("GET", "/commercial/api/products/?{}".format(urlencode(query)))[0]
+
+    def search(self):
+        query = {"q": self.random.choice(SEARCH_TERMS)}
+
+        return self.request("GET", "/commercial/api/products/search/?{}".format(urlencode(query)))[0]
+
+    def get_cart(self):
+        status = self.request("GET", "/commercial/api/carts/get-cart/")[0]
+
+        return 200 if status == 404 else status
+
+    def add_to_cart(self):
+        new_item = {"product_id": self.random.choice(self.product_ids)}
+        status, content = self.request("GET", "/commercial/api/carts/get-cart/?fields=id")
+        if status == 404:
+            return self.request("POST", "/commercial/api/carts/", {"user": self.user_id, "items": [new_item]})[0]
+        if status != 200:
+            return status
+
+        cart_id = json.loads(content)["id"]
+
+        return self.request("POST", "/commercial/api/carts/{}/items/?compact=true".format(cart_id), new_item)[0]
+
+    def checkout(self):
+        status = self.request("POST", "/commercial/api/orders/create-order-through-cart/")[0]
+
+        return 201 if status == 404 else status
+
+
+def percentile(latencies, fraction):
+    """Nearest-rank percentile of sorted latencies."""
+    if not latencies:
+        return None
+
+    return latencies[min(len(latencies), max(1, math.ceil(fraction * len(latencies)))) - 1]
+
+
+def summarize(latencies, duration):
+    latencies = sorted(latencies)
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    """
+    Replays the weighted ``workload`` with ``concurrency`` virtual users, each in its own thread, for
+    ``requests`` actions or ``duration`` seconds, whichever ends first, after ``warmup`` untimed actions.
+    An action fails when it answers with a 5xx or an unexpected 4xx (users without a cart are expected).
+    """
+
+    def __init__(self, transport, users, product_ids, concurrency=8, requests=1000, duration=None, warmup=0,
+                 workload=None, seed=None):
+        self.transport = transport
+        self.users = users
+        self.product_ids = product_ids
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.warmup = warmup
+        self.workload = workload or WORKLOAD
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.started_at = None
+        self.deadline = None
+        self.failure = None
+        self.latencies = {action: [] for action in self.workload}
+        self.errors = {action: 0 for action in self.workload}
+
+    def _start(self):
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + self.duration if self.duration else None
+
+    def _take(self):
+        with self.lock:
+            if self.remaining <= 0 or (self.deadline is not None and time.monotonic() >= self.deadline):
+                return False
+            self.remaining -= 1
+            return True
+
+    def _run_user(self, user, barrier):
+        actions = list(self.workload)
+        weights = [self.workload[action] for action in actions]
+        try:
+            try:
+                user.login()
+                for action in user.random.choices(actions, weights, k=self.warmup):
+                    getattr(user, action)()
+            except Exception as error:
+                self.failure = error
+                barrier.abort()
+                return
+            barrier.wait()
+
+            while self._take():
+                action = user.random.choices(actions, weights)[0]
+                started_at = time.perf_counter()
+                try:
+                    status = getattr(user, action)()
+                except Exception:
+                    status = None
+                latency = round((time.perf_counter() - started_at) * 1000, 2)
+                with self.lock:
+                    self.latencies[action].append(latency)
+                    if status is None or status >= 400:
+                        self.errors[action] += 1
+        finally:
+            self.transport.close()
+
+    def run(self):
+        """Runs the workload and returns the report, see ``report``."""
+        self.remaining = self.requests if self.requests else float("inf")
+        self.failure = None
+        virtual_users = [
+            VirtualUser(self.transport, username, password, user_id, self.product_ids,
+                        random.Random(self.random.random()))
+            for username, password, user_id in self.random.sample(self.users, min(self.concurrency, len(self.users)))
+        ]
+        # The clock starts when every virtual user has logged in and warmed up.
+        barrier = threading.Barrier(len(virtual_users), action=self._start)
+        threads = [
+            threading.Thread(target=self._run_user, args=(user, barrier), daemon=True)
+            for user in virtual_users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.failure is not None:
+            raise RuntimeError("The benchmark could not start: {}".format(self.failure))
+
+        return self.report(time.monotonic() - self.started_at)
+
+    def report(self, elapsed):
+        """Throughput and latency percentiles (in milliseconds) of each action and of the whole run."""
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+
+        return {
+            "commit": current_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "transport": type(self.transport).__name__,
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 3),
+            "total": {**summarize(all_latencies, elapsed), "errors": sum(self.errors.values())},
+            "endpoints": {
+                action: {**summarize(latencies, elapsed), "errors": self.errors[action]}
+                for action, latencies in self.latencies.items()
+            },
+        }
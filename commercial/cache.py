@@ -0,0 +1,218 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from commercial.metrics import catalog_cache_lookups
+from games_e_commerce.compiled import CompiledSerializer
+from games_e_commerce.fieldsets import EXCLUDE_QUERY_PARAM, FIELDS_QUERY_PARAM
+from games_e_commerce.instrumentation import timed
+from games_e_commerce.renderers import EncodedJSON, FastJSONRenderer, dumps
+
+GENERATION_KEY = "catalog:generation"
+HITS_KEY = "catalog:hits"
+MISSES_KEY = "catalog:misses"
+FRAGMENT_KEY = "catalog:fragment:{}:{}:{}"
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _incr(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_generation():
+    cache = get_catalog_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # A time based seed keeps an evicted counter from coming back to an already used generation.
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    return generation
+
+
+def invalidate_catalog():
+    """Makes every cached catalog response stale by bumping the generation counter."""
+    cache = get_catalog_cache()
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation = int(time.time() * 1000)
+        cache.set(GENERATION_KEY, generation, timeout=None)
+
+        return generation
+
+
+def catalog_cache_stats():
+    cache = get_catalog_cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    lookups = hits + misses
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / lookups if lookups else 0.0,
+        "generation": get_generation(),
+    }
+
+
+def build_catalog_key(request, action, pk=None):
+    query = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr((request.scheme, request.get_host(), query)).encode()).hexdigest()
+
+    return "catalog:{}:{}:{}:{}".format(get_generation(), action, pk or "", digest)
+
+
+def get_catalog_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def cached_catalog_value(request, action, compute, pk=None):
+    """Returns the value cached for the request under the current generation, computing it on a miss."""
+    cache = get_catalog_cache()
+    key = build_catalog_key(request, action, pk)
+
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=get_catalog_timeout())
+
+    return value
+
+
+class CatalogCacheMixin:
+    """
+    Caches the serialized data of the list and retrieve responses of a viewset,
+    keyed by the query string (ordering, filters, page, page_size) and the catalog generation.
+    """
+    catalog_cache_timeout = None
+
+    def _cached_response(self, request, action, handler, pk=None):
+        cache = get_catalog_cache()
+        key = build_catalog_key(request, action, pk)
+
+        data = cache.get(key)
+        if data is not None:
+            _incr(cache, HITS_KEY)
+            catalog_cache_lookups.inc("response", "hit")
+            return Response(data)
+
+        _incr(cache, MISSES_KEY)
+        catalog_cache_lookups.inc("response", "miss")
+        response = handler()
+        if response.status_code == status.HTTP_200_OK and not response.streaming:
+            timeout = self.catalog_cache_timeout or get_catalog_timeout()
+            cache.set(key, response.data, timeout=timeout)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            request,
+            "list",
+            lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request,
+            "retrieve",
+            lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs),
+            pk=kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+        )
+
+
+def build_fragment_variant(request):
+    """Digest of what, besides the instance itself, shapes its representation: the origin and the fieldsets."""
+    params = (
+        request.scheme,
+        request.get_host(),
+        request.query_params.get(FIELDS_QUERY_PARAM),
+        request.query_params.get(EXCLUDE_QUERY_PARAM),
+    )
+
+    return hashlib.md5(repr(params).encode()).hexdigest()
+
+
+def encoded_fragments(request, instances, to_representation):
+    """
+    Returns the instances as ``EncodedJSON`` fragments. The encoded bytes are cached under ``(id, updated_at)``,
+    so only the instances that changed since they were last encoded are serialized again.
+    """
+    cache = get_catalog_cache()
+    variant = build_fragment_variant(request)
+    keys = [
+        FRAGMENT_KEY.format(variant, instance.pk, instance.updated_at.timestamp())
+        for instance in instances
+    ]
+    cached = cache.get_many(keys)
+
+    fragments = []
+    missing = {}
+    for key, instance in zip(keys, instances):
+        encoded = cached.get(key)
+        if encoded is None:
+            encoded = missing[key] = dumps(to_representation(instance))
+        fragments.append(EncodedJSON(encoded))
+
+    if missing:
+        cache.set_many(missing, timeout=get_catalog_timeout())
+    catalog_cache_lookups.inc("fragment", "hit", amount=len(fragments) - len(missing))
+    catalog_cache_lookups.inc("fragment", "miss", amount=len(missing))
+
+    return fragments
+
+
+class FragmentListSerializer:
+    """Read-only stand-in for a ``many=True`` serializer whose items are rendered from the fragment cache."""
+
+    def __init__(self, serializer, request, instances):
+        self.serializer = serializer
+        self.request = request
+        self.instances = instances
+
+    @property
+    def data(self):
+        if isinstance(self.serializer, CompiledSerializer):
+            to_representation = self.serializer.compile()
+        else:
+            to_representation = self.serializer.child.to_representation
+
+        instances = list(self.instances)
+        with timed("serialize"):
+            return encoded_fragments(self.request, instances, to_representation)
+
+
+class FragmentCacheMixin:
+    """
+    Renders the items of the ``fragment_actions`` list responses from pre-encoded fragments, when the
+    ``FRAGMENT_CACHE`` setting is on and the response is rendered by ``FastJSONRenderer``.
+    """
+    fragment_actions = ("list",)
+
+    def use_fragment_cache(self):
+        renderer = getattr(self.request, "accepted_renderer", None)
+
+        return (
+            getattr(settings, "FRAGMENT_CACHE", True)
+            and getattr(self, "action", None) in self.fragment_actions
+            and isinstance(renderer, FastJSONRenderer)
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if args and kwargs.get("many") and kwargs.get("data") is None and self.use_fragment_cache():
+            return FragmentListSerializer(serializer, self.request, args[0])
+
+        return serializer
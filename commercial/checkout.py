@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from commercial.models import Cart, Order, OrderItem
+from commercial.pricing import price_items
+
+
+@transaction.atomic
+def checkout_cart(user):
+    """
+    Turns the cart of the user into an order with a fixed number of queries:
+    the cart row is locked, its items are read once, the order is created with its totals,
+    the order items are inserted with one ``bulk_create`` and the cart is removed.
+
+    Returns ``None`` when the user has no cart.
+    """
+    cart = Cart.objects.select_for_update().filter(user=user).first()
+    if not cart:
+        return None
+
+    cart_items = list(cart.cartitem_set.all())
+    pricing = price_items(cart_items)
+
+    order = Order.objects.create(
+        user=user,
+        freight=pricing.total_freight,
+        subtotal_price=pricing.subtotal_price,
+        items_count=pricing.items_count,
+        total_price=pricing.total_price,
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product_id=item.product_id, price=item.price, quantity=item.quantity)
+        for item in cart_items
+    )
+
+    Cart.objects.filter(pk=cart.pk).delete()
+
+    return order
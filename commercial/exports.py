@@ -0,0 +1,143 @@
+import csv
+import io
+
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from commercial.serializers import OrderSerializer, ProductSerializer
+from games_e_commerce.compiled import compile_serializer
+from games_e_commerce.renderers import dumps
+from games_e_commerce.streaming import iterate_chunks, streaming_response
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_CHUNK_SIZE = 1000
+
+PRODUCT_CSV_COLUMNS = ["id", "name", "price", "score", "image", "created_at", "updated_at"]
+ORDER_CSV_COLUMNS = [
+    "order_id",
+    "user_id",
+    "created_at",
+    "freight",
+    "subtotal_price",
+    "items_count",
+    "total_price",
+    "item_id",
+    "product_id",
+    "product_name",
+    "price",
+    "quantity",
+]
+
+
+class CreatedAtRangeFilter(filters.FilterSet):
+    created_after = filters.DateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.DateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+
+def _isoformat(value):
+    return timezone.localtime(value).isoformat() if value else ""
+
+
+def product_csv_rows(product):
+    yield [
+        product.id,
+        product.name,
+        product.price,
+        product.score,
+        product.image.name if product.image else "",
+        _isoformat(product.created_at),
+        _isoformat(product.updated_at),
+    ]
+
+
+def order_csv_rows(order):
+    """One row per order item, with the order columns repeated. Orders without items get one row."""
+    order_columns = [
+        order.id,
+        order.user_id,
+        _isoformat(order.created_at),
+        order.freight,
+        order.subtotal_price,
+        order.items_count,
+        order.total_price,
+    ]
+    items = order.orderitem_set.all()
+    if not items:
+        yield order_columns + [""] * 5
+    for item in items:
+        yield order_columns + [item.id, item.product_id, item.product.name, item.price, item.quantity]
+
+
+def ndjson_lines(chunks, to_representation):
+    for chunk in chunks:
+        yield b"".join(dumps(to_representation(instance)) + b"\n" for instance in chunk)
+
+
+def csv_lines(chunks, columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        for instance in chunk:
+            writer.writerows(rows(instance))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class Export:
+    """
+    Streams a queryset as NDJSON (the API representation, one object per line) or CSV, read in chunks with a
+    server side cursor and gzipped on the fly, so exports of any size run in constant memory.
+    """
+
+    def __init__(self, name, serializer_class, csv_columns, csv_rows, prefetch=()):
+        self.name = name
+        self.serializer_class = serializer_class
+        self.csv_columns = csv_columns
+        self.csv_rows = csv_rows
+        self.prefetch = prefetch
+
+    def get_format(self, request):
+        export_format = request.query_params.get("output", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({"output": "Choose one of: {}.".format(", ".join(EXPORT_FORMATS))})
+
+        return export_format
+
+    def filter_queryset(self, request, queryset):
+        filterset = CreatedAtRangeFilter(request.query_params, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        return filterset.qs.order_by("id").prefetch_related(*self.prefetch)
+
+    def response(self, request, queryset):
+        export_format = self.get_format(request)
+        chunks = iterate_chunks(self.filter_queryset(request, queryset), EXPORT_CHUNK_SIZE)
+        if export_format == "csv":
+            lines = csv_lines(chunks, self.csv_columns, self.csv_rows)
+        else:
+            serializer = self.serializer_class(context={"request": request})
+            lines = ndjson_lines(chunks, compile_serializer(serializer))
+
+        filename = "{}-{}.{}".format(self.name, timezone.now().strftime("%Y%m%d%H%M%S"), export_format)
+
+        return streaming_response(request, lines, EXPORT_FORMATS[export_format], filename)
+
+
+products_export = Export("products", ProductSerializer, PRODUCT_CSV_COLUMNS, product_csv_rows)
+orders_export = Export(
+    "orders",
+    OrderSerializer,
+    ORDER_CSV_COLUMNS,
+    order_csv_rows,
+    prefetch=("orderitem_set", "orderitem_set__product"),
+)
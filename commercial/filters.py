@@ -0,0 +1,50 @@
+from django.db.models import Count, Q
+from django_filters import rest_framework as filters
+
+from commercial.models import Product
+
+PRICE_BANDS = [(None, 50), (50, 100), (100, 200), (200, None)]
+SCORE_BANDS = [(None, 100), (100, 200), (200, 300), (300, None)]
+
+
+class ProductFilter(filters.FilterSet):
+    min_price = filters.NumberFilter(field_name="price", lookup_expr="gte")
+    max_price = filters.NumberFilter(field_name="price", lookup_expr="lte")
+    min_score = filters.NumberFilter(field_name="score", lookup_expr="gte")
+    max_score = filters.NumberFilter(field_name="score", lookup_expr="lte")
+
+    class Meta:
+        model = Product
+        fields = ["name", "price", "score"]
+
+
+def _band_condition(field, lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(**{"{}__gte".format(field): lower})
+    if upper is not None:
+        condition &= Q(**{"{}__lt".format(field): upper})
+
+    return condition
+
+
+def product_facets(queryset):
+    """
+    Counts the products of the queryset by price and score bands, ``[min, max)``,
+    with one aggregate query using a filtered ``COUNT`` per band.
+    """
+    bands = {"price": PRICE_BANDS, "score": SCORE_BANDS}
+    aggregates = {}
+    for field, field_bands in bands.items():
+        for index, (lower, upper) in enumerate(field_bands):
+            aggregates["{}_{}".format(field, index)] = Count("pk", filter=_band_condition(field, lower, upper))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        field: [
+            {"min": lower, "max": upper, "count": counts["{}_{}".format(field, index)]}
+            for index, (lower, upper) in enumerate(field_bands)
+        ]
+        for field, field_bands in bands.items()
+    }
@@ -0,0 +1,189 @@
+import io
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+from PIL import Image
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Product
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIRECTORY = "images/variants"
+VARIANT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+_pool = None
+_background = None
+_pool_lock = threading.Lock()
+
+
+def get_variant_widths():
+    return getattr(settings, "IMAGE_VARIANT_WIDTHS", [160, 320, 640])
+
+
+def get_variant_formats():
+    return getattr(settings, "IMAGE_VARIANT_FORMATS", ["webp", "jpeg"])
+
+
+def variants_enabled():
+    return getattr(settings, "IMAGE_VARIANTS", True)
+
+
+def get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=getattr(settings, "IMAGE_WORKERS", None))
+
+    return _pool
+
+
+def variants_in_background():
+    return getattr(settings, "IMAGE_VARIANTS_IN_BACKGROUND", True)
+
+
+def get_background():
+    """One thread per process, queueing the variants of the products saved by requests."""
+    global _background
+
+    with _pool_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants")
+
+    return _background
+
+
+def render_variants(source, widths, formats, quality=80):
+    """
+    Resizes the image bytes to each width (never upscaling) and encodes it in each format, returning
+    ``[(format, width, bytes)]``. Pure Pillow work, run in the process pool.
+    """
+    with Image.open(io.BytesIO(source)) as image:
+        image.load()
+        image = image.convert("RGBA") if image.mode not in ("RGB", "RGBA") else image
+
+        variants = []
+        for width in sorted({min(width, image.width) for width in widths}):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS) if width != image.width else image
+            for variant_format in formats:
+                output = io.BytesIO()
+                if variant_format == "jpeg":
+                    flattened = Image.new("RGB", resized.size, "white")
+                    flattened.paste(resized, mask=resized.getchannel("A") if resized.mode == "RGBA" else None)
+                    flattened.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+                else:
+                    resized.save(output, "WEBP", quality=quality, method=4)
+                variants.append((variant_format, width, output.getvalue()))
+
+    return variants
+
+
+def save_variant(variant_format, width, content):
+    """The media storage adds the hash of the content to the name, so identical variants are stored once."""
+    name = "{}/{}w.{}".format(VARIANTS_DIRECTORY, width, VARIANT_EXTENSIONS[variant_format])
+
+    return default_storage.save(name, ContentFile(content))
+
+
+def variants_are_current(image_name, variants):
+    return bool(image_name) and (variants or {}).get("source") == image_name
+
+
+def _read_source(image_name):
+    try:
+        with default_storage.open(image_name, "rb") as image_file:
+            return image_file.read()
+    except OSError:
+        logger.warning("Could not read %s to generate its variants.", image_name)
+        return None
+
+
+def generate_variants(products, window=32, inline=False):
+    """
+    Generates the variants of ``products``, an iterable of ``(product id, image name)``, in the process pool
+    (or in the calling thread when ``inline``) and stores their names in ``Product.image_variants``.
+    At most ``window`` source images are in memory at once.
+    """
+    widths = get_variant_widths()
+    formats = get_variant_formats()
+    quality = getattr(settings, "IMAGE_VARIANT_QUALITY", 80)
+
+    generated = 0
+    products = iter(products)
+    while True:
+        batch = list(islice(products, window))
+        if not batch:
+            break
+
+        jobs = []
+        for product_id, image_name in batch:
+            source = _read_source(image_name)
+            if source is not None:
+                render = partial(render_variants, source, widths, formats, quality)
+                jobs.append((product_id, image_name, render if inline else get_pool().submit(render).result))
+
+        for product_id, image_name, result in jobs:
+            try:
+                rendered = result()
+            except Exception:
+                logger.exception("Could not generate the variants of %s.", image_name)
+                continue
+
+            variants = {"source": image_name}
+            for variant_format, width, content in rendered:
+                variants.setdefault(variant_format, {})[str(width)] = save_variant(variant_format, width, content)
+
+            # The image may have changed in the meantime, in which case these variants are already stale.
+            generated += Product.objects.filter(pk=product_id, image=image_name).update(
+                image_variants=variants,
+                updated_at=timezone.now(),
+            )
+
+    if generated:
+        invalidate_catalog()
+
+    return generated
+
+
+def _generate_in_background(products):
+    try:
+        generate_variants(products, inline=True)
+    except Exception:
+        logger.exception("Could not generate the variants of %s.", products)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(products):
+    """
+    Generates the variants of ``products`` without waiting for them: in the background thread of this process,
+    so a request returns at once and ``image_variants`` stays stale until they are stored. The rendering runs in
+    that thread, a web worker never forks the process pool. With ``IMAGE_VARIANTS_IN_BACKGROUND`` off, they are
+    generated before returning.
+    """
+    products = list(products)
+    if not variants_in_background():
+        return generate_variants(products)
+
+    get_background().submit(_generate_in_background, products)
+
+
+def build_srcset(variants, build_url):
+    """Returns the ``srcset`` of each format of the variants, e.g. ``{"webp": "<url> 160w, <url> 320w"}``."""
+    srcset = {}
+    for variant_format in get_variant_formats():
+        names = sorted((variants.get(variant_format) or {}).items(), key=lambda item: int(item[0]))
+        if names:
+            srcset[variant_format] = ", ".join("{} {}w".format(build_url(name), width) for width, name in names)
+
+    return srcset
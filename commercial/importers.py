@@ -0,0 +1,216 @@
+import csv
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from commercial.cache import invalidate_catalog
+from commercial.images import generate_variants, variants_are_current, variants_enabled
+from commercial.models import Product
+
+FEED_FORMATS = ("json", "ndjson", "csv")
+READ_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s*")
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def guess_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "jsonl":
+        return "ndjson"
+
+    return extension if extension in FEED_FORMATS else None
+
+
+def read_json_array(stream):
+    """Yields the items of a JSON array one at a time, without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if not started:
+                if char != "[":
+                    raise InvalidRecord("The JSON feed must be an array of products.")
+                started = True
+                position += 1
+                continue
+            if char == "]":
+                return
+            if char == ",":
+                position += 1
+                continue
+
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item may continue in the next chunk.
+                if eof:
+                    raise InvalidRecord("The JSON feed is malformed.")
+            else:
+                yield item
+                continue
+        elif eof:
+            if started:
+                raise InvalidRecord("The JSON feed is truncated.")
+            return
+
+        chunk = stream.read(READ_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def read_ndjson(stream):
+    """
+    Yields the record of each non blank line. A malformed line yields an ``InvalidRecord`` with its line number,
+    which ``normalize_record`` raises, so it is skipped and reported like the other invalid records.
+    """
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield InvalidRecord("Malformed JSON on line {}: {}.".format(number, exc.msg))
+
+
+def read_csv(stream):
+    """
+    Yields the rows of a CSV feed as dicts. A malformed row (e.g. a field over ``csv.field_size_limit()``) yields
+    an ``InvalidRecord``, which ``normalize_record`` raises, so it is skipped like the other invalid records.
+    """
+    reader = csv.DictReader(stream)
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield InvalidRecord("Malformed CSV row: {}.".format(exc))
+
+
+def read_feed(stream, feed_format):
+    """Yields the raw records of a JSON, NDJSON or CSV feed in the ``commercial/statics/data/products.json`` shape."""
+    if feed_format == "json":
+        return read_json_array(stream)
+    if feed_format == "ndjson":
+        return read_ndjson(stream)
+
+    return read_csv(stream)
+
+
+def normalize_record(record):
+    """Validates a raw feed record, returning a ``{name, price, score, image}`` dict."""
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord("Records must be objects.")
+
+    name = str(record.get("name") or "").strip()
+    if not name or len(name) > Product._meta.get_field("name").max_length:
+        raise InvalidRecord("Invalid name: {!r}.".format(record.get("name")))
+
+    try:
+        price = Decimal(str(record.get("price"))).quantize(Decimal("0.01"))
+        score = record.get("score")
+        score = int(score) if score not in (None, "") else None
+    except (InvalidOperation, TypeError, ValueError):
+        raise InvalidRecord("Invalid price or score for {!r}.".format(name))
+    if price < 0 or (score is not None and score < 0):
+        raise InvalidRecord("Negative price or score for {!r}.".format(name))
+
+    return {"name": name, "price": price, "score": score, "image": (record.get("image") or "").strip() or None}
+
+
+def copy_image(images_dir, image):
+    """
+    Copies a feed image into the media storage under ``images/``, returning its storage name.
+    The storage names files by content, so importing a feed again does not copy them twice.
+    """
+    name = "images/{}".format(os.path.basename(image))
+    with open(os.path.join(images_dir, image), "rb") as image_file:
+        return default_storage.save(name, File(image_file))
+
+
+class ProductImporter:
+    """
+    Upserts products by name in batches: the images of a batch are copied with a thread pool, the
+    rows are written with one ``INSERT ... ON CONFLICT (name) DO UPDATE`` per batch and the variants
+    of the new images are then generated in the image process pool.
+    """
+
+    def __init__(self, images_dir, workers=8):
+        self.images_dir = images_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.images_imported = 0
+
+    def close(self):
+        self.executor.shutdown()
+
+    def _copy_image(self, record):
+        if record["image"] is None:
+            return None
+
+        try:
+            return copy_image(self.images_dir, record["image"])
+        except OSError:
+            return None
+
+    def import_batch(self, records):
+        """Writes a batch of normalized records, returning the number of images that could not be copied."""
+        # The same name can't be upserted twice by one statement, the last record of a name wins.
+        records = list({record["name"]: record for record in records}.values())
+        images = list(self.executor.map(self._copy_image, records))
+
+        with_image = []
+        without_image = []
+        missing_images = 0
+        for record, image in zip(records, images):
+            product = Product(name=record["name"], price=record["price"], score=record["score"], image=image)
+            if image:
+                with_image.append(product)
+            else:
+                missing_images += record["image"] is not None
+                without_image.append(product)
+        self.images_imported += len(with_image)
+
+        update_fields = ["price", "score", "updated_at"]
+        with transaction.atomic():
+            self._upsert(with_image, update_fields + ["image"])
+            # Products without an image in the feed keep the image they already have.
+            self._upsert(without_image, update_fields)
+        invalidate_catalog()
+
+        if with_image and variants_enabled():
+            products = Product.objects.filter(name__in=[product.name for product in with_image])
+            generate_variants(
+                (product_id, image)
+                for product_id, image, variants in products.values_list("id", "image", "image_variants")
+                if not variants_are_current(image, variants)
+            )
+
+        return missing_images
+
+    def _upsert(self, products, update_fields):
+        if products:
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=update_fields,
+            )
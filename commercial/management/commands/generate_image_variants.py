@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from commercial.images import generate_variants, variants_are_current
+from commercial.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generates the resized image variants of the products that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Generate the variants of every product again.")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image="").exclude(image=None).order_by("id")
+        pending = (
+            (product_id, image)
+            for product_id, image, variants in products.values_list("id", "image", "image_variants").iterator()
+            if options["force"] or not variants_are_current(image, variants)
+        )
+
+        generated = generate_variants(pending)
+
+        self.stdout.write(self.style.SUCCESS("Generated the image variants of {} products.".format(generated)))
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from commercial.importers import FEED_FORMATS, InvalidRecord, ProductImporter, guess_format, normalize_record, read_feed
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports products from a JSON, NDJSON or CSV feed in the commercial/statics/data/products.json shape, "
+        "creating them or updating them by name. Interrupted imports can be resumed with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("feed", help="Path of the feed file.")
+        parser.add_argument("--format", choices=FEED_FORMATS, help="Feed format, guessed from the extension by default.")
+        parser.add_argument("--images-dir", help="Directory of the feed images, the feed directory by default.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Products written per query.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads used to copy the images.")
+        parser.add_argument("--checkpoint", help="Checkpoint file, <feed>.checkpoint by default.")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the records already imported according to the checkpoint file.",
+        )
+
+    def _feed_signature(self, path):
+        stat = os.stat(path)
+
+        return {"feed": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def _read_checkpoint(self, checkpoint, signature):
+        if not os.path.exists(checkpoint):
+            return 0
+
+        with open(checkpoint) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if any(state.get(key) != value for key, value in signature.items()):
+            raise CommandError("The checkpoint {} belongs to another feed or the feed changed.".format(checkpoint))
+
+        return state["offset"]
+
+    def _write_checkpoint(self, checkpoint, signature, offset):
+        temporary = "{}.tmp".format(checkpoint)
+        with open(temporary, "w") as checkpoint_file:
+            json.dump({**signature, "offset": offset}, checkpoint_file)
+        os.replace(temporary, checkpoint)
+
+    def handle(self, *args, **options):
+        path = options["feed"]
+        if not os.path.isfile(path):
+            raise CommandError("The feed {} does not exist.".format(path))
+
+        feed_format = options["format"] or guess_format(path)
+        if feed_format is None:
+            raise CommandError("Could not guess the feed format, use --format.")
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive.")
+
+        checkpoint = options["checkpoint"] or "{}.checkpoint".format(path)
+        signature = self._feed_signature(path)
+        offset = self._read_checkpoint(checkpoint, signature) if options["resume"] else 0
+        if offset:
+            self.stdout.write("Resuming after record {}.".format(offset))
+
+        importer = ProductImporter(options["images_dir"] or os.path.dirname(os.path.abspath(path)), options["workers"])
+        position = offset
+        imported = invalid = missing_images = 0
+        started_at = time.monotonic()
+        try:
+            with open(path, newline="", encoding="utf-8") as stream:
+                records = enumerate(read_feed(stream, feed_format), start=1)
+                for _ in islice(records, offset):
+                    pass
+
+                while True:
+                    batch = []
+                    for position, record in islice(records, options["batch_size"]):
+                        try:
+                            batch.append(normalize_record(record))
+                        except InvalidRecord as exc:
+                            invalid += 1
+                            self.stderr.write("Skipping record {}: {}".format(position, exc))
+                    if not batch and position == offset:
+                        break
+
+                    if batch:
+                        missing_images += importer.import_batch(batch)
+                        imported += len(batch)
+                    self._write_checkpoint(checkpoint, signature, position)
+                    offset = position
+
+                    elapsed = time.monotonic() - started_at
+                    self.stdout.write("{} products imported, {:.0f} products/s.".format(
+                        imported,
+                        imported / elapsed if elapsed else 0,
+                    ))
+        except ValueError as exc:
+            raise CommandError("Import stopped after record {}: {}".format(offset, exc))
+        finally:
+            importer.close()
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {} products in {:.1f}s ({:.0f} products/s, {} images, {} invalid records, "
+            "{} missing images).".format(
+                imported,
+                elapsed,
+                imported / elapsed if elapsed else 0,
+                importer.images_imported,
+                invalid,
+                missing_images,
+            )
+        ))
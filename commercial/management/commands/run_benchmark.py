@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from commercial.benchmark import WORKLOAD, BenchmarkRunner, HTTPTransport, InProcessTransport
+from commercial.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a mixed workload (browse, search, add to cart, get-cart, checkout) as the users created by "
+        "seed_benchmark and reports the throughput and p50/p95/p99 latencies of each action as JSON. "
+        "Requests go to the application in this process, or to a running server with --url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Virtual users, each in its own thread.")
+        parser.add_argument("--requests", type=int, default=1000, help="Actions to run, in total.")
+        parser.add_argument("--duration", type=float, help="Seconds to run for, instead of a number of actions.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed actions of each virtual user.")
+        parser.add_argument("--prefix", default="bench", help="Prefix of the usernames, as in seed_benchmark.")
+        parser.add_argument("--password", default="benchmark")
+        parser.add_argument("--seed", type=int, help="Random seed, to replay the same workload.")
+        parser.add_argument(
+            "--workload",
+            help="Weights of the actions, e.g. browse=40,search=15,add_to_cart=15,get_cart=20,checkout=10.",
+        )
+        parser.add_argument("--output", help="File to write the report to, instead of the standard output.")
+
+    def _parse_workload(self, workload):
+        if not workload:
+            return WORKLOAD
+
+        weights = {}
+        for entry in workload.split(","):
+            action, _, weight = entry.partition("=")
+            if action.strip() not in WORKLOAD or not weight.strip().isdigit():
+                raise CommandError("Invalid workload entry {!r}, the actions are: {}.".format(
+                    entry, ", ".join(WORKLOAD),
+                ))
+            weights[action.strip()] = int(weight)
+
+        return weights
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be positive.")
+
+        users = [
+            (username, options["password"], user_id)
+            for user_id, username in User.objects.filter(
+                username__startswith="{}_user_".format(options["prefix"]),
+            ).values_list("id", "username")
+        ]
+        product_ids = list(Product.objects.values_list("id", flat=True))
+        if not users or not product_ids:
+            raise CommandError("There is no benchmark data, run seed_benchmark first.")
+
+        runner = BenchmarkRunner(
+            HTTPTransport(options["url"]) if options["url"] else InProcessTransport(),
+            users,
+            product_ids,
+            concurrency=options["concurrency"],
+            requests=None if options["duration"] else options["requests"],
+            duration=options["duration"],
+            warmup=options["warmup"],
+            workload=self._parse_workload(options["workload"]),
+            seed=options["seed"],
+        )
+        try:
+            report = json.dumps(runner.run(), indent=2)
+        except RuntimeError as error:
+            raise CommandError(str(error))
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+            self.stdout.write("Report written to {}.".format(options["output"]))
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from commercial.seeding import BenchmarkSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates users, products, carts and orders for benchmarks. The users are named <prefix>_user_<n> and "
+        "share the --password, which is what run_benchmark logs in with."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--cart-ratio", type=float, default=0.5, help="Share of the users with a cart.")
+        parser.add_argument("--orders", type=int, default=1000, help="Total orders of the users.")
+        parser.add_argument("--prefix", default="bench", help="Prefix of the usernames.")
+        parser.add_argument("--password", default="benchmark")
+        parser.add_argument("--seed", type=int, help="Random seed, to generate the same data again.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows written per query.")
+
+    def _stage(self, label, seed):
+        started_at = time.monotonic()
+        result = seed()
+        self.stdout.write("{} in {:.1f}s.".format(label(result), time.monotonic() - started_at))
+
+        return result
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["products"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--users, --products and --batch-size must be positive.")
+        if not 0 <= options["cart_ratio"] <= 1:
+            raise CommandError("--cart-ratio must be between 0 and 1.")
+
+        seeder = BenchmarkSeeder(options["prefix"], options["password"], options["seed"], options["batch_size"])
+
+        user_ids = self._stage(
+            lambda user_ids: "{} users".format(len(user_ids)),
+            lambda: seeder.seed_users(options["users"]),
+        )
+        products = self._stage(
+            lambda products: "{} products".format(len(products)),
+            lambda: seeder.seed_products(options["products"]),
+        )
+        with_cart = seeder.random.sample(user_ids, round(len(user_ids) * options["cart_ratio"]))
+        self._stage(
+            lambda created: "{} new carts".format(created),
+            lambda: seeder.seed_carts(with_cart, products),
+        )
+        self._stage(
+            lambda created: "{} new orders".format(created),
+            lambda: seeder.seed_orders(options["orders"], user_ids, products),
+        )
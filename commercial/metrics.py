@@ -0,0 +1,23 @@
+from games_e_commerce.metrics import registry
+
+catalog_cache_lookups = registry.counter(
+    "catalog_cache_lookups_total",
+    "Lookups in the catalog caches: whole responses and per product fragments.",
+    ["cache", "result"],
+)
+orders_created = registry.counter("orders_created_total", "Orders created, directly or through a cart.")
+cart_items_added = registry.counter("cart_items_added_total", "Items added to carts.")
+
+
+@registry.derive
+def catalog_cache_hit_ratio(values):
+    lookups = {}
+    for key, count in values[catalog_cache_lookups.name].items():
+        cache, result = catalog_cache_lookups.labels(key)
+        hits, total = lookups.get(cache, (0, 0))
+        lookups[cache] = (hits + count * (result == "hit"), total + count)
+
+    yield "# HELP catalog_cache_hit_ratio Share of the catalog cache lookups that were hits."
+    yield "# TYPE catalog_cache_hit_ratio gauge"
+    for cache, (hits, total) in sorted(lookups.items()):
+        yield "catalog_cache_hit_ratio{{cache=\"{}\"}} {}".format(cache, hits / total)
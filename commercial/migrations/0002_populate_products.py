@@ -3,6 +3,7 @@ import json
 
 from django.conf import settings
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.db import migrations
 
 
@@ -10,18 +11,20 @@ def create_products(apps, _):
     Product = apps.get_model("commercial", "Product")
 
     statics_path = "{}/commercial/statics".format(settings.BASE_DIR)
-    products_file = open("{}/data/products.json".format(statics_path))
-    products_list = json.load(products_file)
+    with open("{}/data/products.json".format(statics_path)) as products_file:
+        products_list = json.load(products_file)
 
+    products = []
     for product in products_list:
-        image = File(open("{}/assets/{}".format(statics_path, product["image"]), "rb"))
-        product_obj = Product(
+        with open("{}/assets/{}".format(statics_path, product["image"]), "rb") as image:
+            image_name = default_storage.save("images/{}".format(product["image"]), File(image))
+        products.append(Product(
             name=product["name"],
             price=product["price"],
             score=product["score"],
-        )
-        product_obj.image.save(product["image"], image, save=False)
-        product_obj.save()
+            image=image_name,
+        ))
+    Product.objects.bulk_create(products)
 
 
 class Migration(migrations.Migration):
@@ -0,0 +1,59 @@
+# Generated by Django 4.1.13 on 2026-10-18 07:31
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 5000
+
+
+def backfill_order_totals(apps, _):
+    Order = apps.get_model("commercial", "Order")
+    OrderItem = apps.get_model("commercial", "OrderItem")
+
+    items = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+    subtotal = items.annotate(total=Sum("price")).values("total")
+    count = items.annotate(total=Count("id")).values("total")
+
+    last_id = 0
+    while True:
+        ids = list(Order.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+
+        Order.objects.filter(id__in=ids).update(
+            subtotal_price=Coalesce(
+                Subquery(subtotal),
+                Value(0),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ),
+            items_count=Coalesce(Subquery(count), Value(0)),
+        )
+        Order.objects.filter(id__in=ids).update(total_price=F("subtotal_price") + F("freight"))
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commercial', '0004_alter_product_image_alter_product_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items count'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Subtotal price'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Total price'),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
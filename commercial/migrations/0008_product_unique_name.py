@@ -0,0 +1,41 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:02
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicated_names(apps, _):
+    """
+    Keeps the name of the oldest product of each duplicated name and suffixes the others with their id
+    (e.g. ``FIFA 18 (#42)``), so the names can be unique. The new names are shown to the customers, so the
+    duplicates should be cleaned up by hand before migrating when these suffixes are not wanted.
+    """
+    Product = apps.get_model("commercial", "Product")
+
+    duplicated = Product.objects.values("name").annotate(total=Count("id")).filter(total__gt=1).values("name")
+    products = Product.objects.filter(name__in=duplicated).order_by("name", "id")
+
+    previous_name = None
+    for product in products.iterator():
+        if product.name == previous_name:
+            suffix = " (#{})".format(product.id)
+            product.name = product.name[:100 - len(suffix)] + suffix
+            product.save(update_fields=["name"])
+        else:
+            previous_name = product.name
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commercial', '0007_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicated_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, verbose_name='Name'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:26
+
+from django.db import migrations, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    """
+    Moves the items of the older carts of each user into their latest cart and deletes the older carts.
+    Each batch of users is merged in its own transaction, so large tables are not locked all at once.
+    """
+    Cart = apps.get_model("commercial", "Cart")
+    CartItem = apps.get_model("commercial", "CartItem")
+    using = schema_editor.connection.alias
+
+    while True:
+        user_ids = list(
+            Cart.objects.using(using)
+            .values("user_id")
+            .annotate(total=Count("id"))
+            .filter(total__gt=1)
+            .values_list("user_id", flat=True)[:BATCH_SIZE]
+        )
+        if not user_ids:
+            break
+
+        with transaction.atomic(using=using):
+            carts = Cart.objects.using(using).filter(user_id__in=user_ids).order_by("user_id", "-created_at", "-id")
+            latest = {}
+            merged = {}
+            for cart_id, user_id in carts.values_list("id", "user_id"):
+                if user_id in latest:
+                    merged[cart_id] = latest[user_id]
+                else:
+                    latest[user_id] = cart_id
+
+            for cart_id, latest_id in merged.items():
+                CartItem.objects.using(using).filter(cart_id=cart_id).update(cart_id=latest_id)
+            Cart.objects.using(using).filter(id__in=merged).delete()
+            Cart.objects.using(using).filter(id__in=latest.values()).update(updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('commercial', '0009_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+    ]
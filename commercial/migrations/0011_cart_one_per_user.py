@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commercial', '0010_merge_duplicate_carts'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user',), name='cart_one_per_user'),
+        ),
+    ]
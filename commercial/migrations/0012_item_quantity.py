@@ -0,0 +1,24 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:34
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commercial', '0011_cart_one_per_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantity'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantity'),
+        ),
+    ]
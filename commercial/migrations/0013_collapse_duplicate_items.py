@@ -0,0 +1,90 @@
+# Generated by Django 4.1.13 on 2026-10-18 08:34
+
+from django.db import migrations, transaction
+from django.db.models import Count
+
+BATCH_SIZE = 500
+ITEM_MODELS = (("CartItem", "cart_id"), ("OrderItem", "order_id"))
+
+
+def collapse_duplicate_items(apps, schema_editor):
+    """
+    Collapses the rows of each cart and order with the same product and price into their first row,
+    whose quantity becomes the number of rows. Each batch of carts or orders is collapsed in its own transaction.
+    """
+    using = schema_editor.connection.alias
+
+    for model_name, parent_field in ITEM_MODELS:
+        model = apps.get_model("commercial", model_name)
+        while True:
+            parent_ids = list(
+                model.objects.using(using)
+                .values(parent_field, "product_id", "price")
+                .annotate(total=Count("id"))
+                .filter(total__gt=1)
+                .values_list(parent_field, flat=True)
+                .distinct()[:BATCH_SIZE]
+            )
+            if not parent_ids:
+                break
+
+            with transaction.atomic(using=using):
+                rows = (
+                    model.objects.using(using)
+                    .filter(**{"{}__in".format(parent_field): parent_ids})
+                    .order_by("id")
+                    .values_list("id", parent_field, "product_id", "price", "quantity")
+                )
+                lines = {}
+                collapsed = {}
+                duplicate_ids = []
+                for item_id, parent_id, product_id, price, quantity in rows:
+                    key = (parent_id, product_id, price)
+                    line = lines.get(key)
+                    if line is None:
+                        lines[key] = model(id=item_id, quantity=quantity)
+                    else:
+                        line.quantity += quantity
+                        collapsed[key] = line
+                        duplicate_ids.append(item_id)
+
+                model.objects.using(using).bulk_update(collapsed.values(), ["quantity"], batch_size=BATCH_SIZE)
+                model.objects.using(using).filter(id__in=duplicate_ids).delete()
+
+
+def expand_items(apps, schema_editor):
+    """Turns every line back into one row per unit."""
+    using = schema_editor.connection.alias
+
+    for model_name, parent_field in ITEM_MODELS:
+        model = apps.get_model("commercial", model_name)
+        while True:
+            lines = list(model.objects.using(using).filter(quantity__gt=1).order_by("id")[:BATCH_SIZE])
+            if not lines:
+                break
+
+            with transaction.atomic(using=using):
+                model.objects.using(using).bulk_create(
+                    model(
+                        **{parent_field: getattr(line, parent_field)},
+                        product_id=line.product_id,
+                        price=line.price,
+                        quantity=1,
+                    )
+                    for line in lines
+                    for _ in range(line.quantity - 1)
+                )
+                model.objects.using(using).filter(id__in=[line.id for line in lines]).update(quantity=1)
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('commercial', '0012_item_quantity'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_duplicate_items, expand_items),
+    ]
@@ -1,8 +1,10 @@
-from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Sum, DecimalField, Value
-from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from commercial.pricing import price_cart, aggregate_items, sum_items
 
 
 class BaseModel(models.Model):
@@ -14,14 +16,21 @@ class BaseModel(models.Model):
 
 
 class Product(BaseModel):
-    name = models.CharField("Name", max_length=100, db_index=True)
+    name = models.CharField("Name", max_length=100, unique=True)
     price = models.DecimalField("Price", max_digits=20, decimal_places=2)
     score = models.PositiveIntegerField("Score", blank=True, null=True)
     image = models.ImageField("Image", upload_to="images", blank=True, null=True)
+    # Resized copies of the image, see ``commercial.images``: {"source": image name, format: {width: name}}.
+    image_variants = models.JSONField("Image variants", default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Product"
         verbose_name_plural = "Products"
+        indexes = [
+            models.Index(fields=["price", "id"], name="product_price_idx"),
+            models.Index(fields=["score", "id"], name="product_score_idx"),
+            models.Index(fields=["name", "id"], name="product_name_id_idx"),
+        ]
 
 
 class Cart(BaseModel):
@@ -30,35 +39,51 @@ class Cart(BaseModel):
     class Meta:
         verbose_name = "Cart"
         verbose_name_plural = "Carts"
+        constraints = [
+            models.UniqueConstraint(fields=["user"], name="cart_one_per_user"),
+        ]
+
+    @classmethod
+    def get_or_create_for(cls, user):
+        """
+        Returns ``(cart, created)`` for the single cart of the user. Safe under concurrent requests: the
+        unique index makes a concurrent insert fail, and the cart it created is returned instead.
+        """
+        return cls.objects.get_or_create(user=user)
+
+    @cached_property
+    def pricing(self):
+        return price_cart(self)
+
+    def reset_pricing(self):
+        self.__dict__.pop("pricing", None)
+
+    @classmethod
+    def touch(cls, *ids):
+        """Bumps ``updated_at`` of the given carts so their conditional GET validators change."""
+        cls.objects.filter(pk__in=ids).update(updated_at=timezone.now())
 
     @property
     def subtotal_price(self):
-        subtotal_price = self.cartitem_set.aggregate(
-            subtotal_price=Coalesce(
-                Sum("price"),
-                Value(0),
-                output_field=DecimalField(max_digits=14, decimal_places=2)
-            )
-        )["subtotal_price"]
+        return float(self.pricing.subtotal_price)
 
-        return float(subtotal_price)
+    @property
+    def items_count(self):
+        return self.pricing.items_count
 
     @property
     def total_freight(self):
-        total_freight = self.cartitem_set.count() * float(settings.FREIGHT_PRICE) if self.subtotal_price < 250 else 0
-
-        return total_freight
+        return float(self.pricing.total_freight)
 
     @property
     def total_price(self):
-        total_price = self.subtotal_price + self.total_freight
-
-        return total_price
+        return float(self.pricing.total_price)
 
 
 class CartItem(BaseModel):
     product = models.ForeignKey(Product, verbose_name="Product", on_delete=models.CASCADE)
     price = models.DecimalField("Price", max_digits=20, decimal_places=2, default=0)
+    quantity = models.PositiveIntegerField("Quantity", default=1, validators=[MinValueValidator(1)])
     cart = models.ForeignKey(Cart, verbose_name="Cart", on_delete=models.CASCADE)
 
     class Meta:
@@ -69,40 +94,50 @@ class CartItem(BaseModel):
         if not self.price:
             self.price = self.product.price
 
-        return super(CartItem, self).save(force_insert, force_update, using, update_fields)
+        result = super(CartItem, self).save(force_insert, force_update, using, update_fields)
+        Cart.touch(self.cart_id)
+
+        return result
+
+    def delete(self, using=None, keep_parents=False):
+        result = super(CartItem, self).delete(using, keep_parents)
+        Cart.touch(self.cart_id)
+
+        return result
 
 
 class Order(BaseModel):
     user = models.ForeignKey(User, verbose_name="User", on_delete=models.CASCADE)
     freight = models.DecimalField("Freight", max_digits=20, decimal_places=2, default=0)
+    subtotal_price = models.DecimalField("Subtotal price", max_digits=20, decimal_places=2, default=0)
+    items_count = models.PositiveIntegerField("Items count", default=0)
+    total_price = models.DecimalField("Total price", max_digits=20, decimal_places=2, default=0)
 
     class Meta:
         verbose_name = "Order"
         verbose_name_plural = "Orders"
-
-    @property
-    def subtotal_price(self):
-        subtotal_price = self.orderitem_set.aggregate(
-            subtotal_price=Coalesce(
-                Sum("price"),
-                Value(0),
-                output_field=DecimalField(max_digits=14, decimal_places=2)
-            )
-        )["subtotal_price"]
-
-        return subtotal_price
-
-    @property
-    def total_price(self):
-        total_price = self.subtotal_price + self.freight
-
-        return total_price
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+        ]
+
+    def refresh_totals(self, items=None):
+        """
+        Recomputes the stored subtotal, item count and total from the order items.
+        When the complete list of items is already loaded it can be given to skip the aggregate query.
+        """
+        if items is None:
+            self.subtotal_price, self.items_count = aggregate_items(self.orderitem_set.all())
+        else:
+            self.subtotal_price, self.items_count = sum_items(items)
+        self.total_price = self.subtotal_price + self.freight
+        self.save(update_fields=["subtotal_price", "items_count", "total_price", "updated_at"])
 
 
 class OrderItem(BaseModel):
     product = models.ForeignKey(Product, verbose_name="Product", on_delete=models.CASCADE)
     order = models.ForeignKey(Order, verbose_name="Order", on_delete=models.CASCADE)
     price = models.DecimalField("Price", max_digits=20, decimal_places=2, default=0)
+    quantity = models.PositiveIntegerField("Quantity", default=1, validators=[MinValueValidator(1)])
 
     class Meta:
         verbose_name = "Order Item"
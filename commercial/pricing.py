@@ -0,0 +1,80 @@
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import DecimalField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+FREE_FREIGHT_THRESHOLD = Decimal("250")
+
+
+class CartPricing(NamedTuple):
+    subtotal_price: Decimal
+    items_count: int
+    total_freight: Decimal
+    total_price: Decimal
+
+
+def _freight_for(subtotal_price, items_count):
+    if subtotal_price < FREE_FREIGHT_THRESHOLD:
+        return items_count * Decimal(str(settings.FREIGHT_PRICE))
+
+    return Decimal(0)
+
+
+def _build_pricing(subtotal_price, items_count):
+    total_freight = _freight_for(subtotal_price, items_count)
+
+    return CartPricing(
+        subtotal_price=subtotal_price,
+        items_count=items_count,
+        total_freight=total_freight,
+        total_price=subtotal_price + total_freight,
+    )
+
+
+def sum_items(items):
+    """
+    Returns the ``(subtotal_price, items_count)`` of already loaded items in a single pass.
+    Each item is a line of ``quantity`` units at the unit ``price``.
+    """
+    subtotal_price = Decimal(0)
+    items_count = 0
+    for item in items:
+        subtotal_price += item.price * item.quantity
+        items_count += item.quantity
+
+    return subtotal_price, items_count
+
+
+def price_items(items):
+    """Prices an iterable of already loaded cart items in a single pass."""
+    return _build_pricing(*sum_items(items))
+
+
+def aggregate_items(queryset):
+    """Returns the ``(subtotal_price, items_count)`` of an item queryset with one aggregate query."""
+    aggregated = queryset.aggregate(
+        subtotal_price=Coalesce(
+            Sum(F("price") * F("quantity")),
+            Value(0),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        ),
+        items_count=Coalesce(Sum("quantity"), Value(0), output_field=IntegerField()),
+    )
+
+    return aggregated["subtotal_price"], aggregated["items_count"]
+
+
+def price_cart(cart):
+    """
+    Computes the cart pricing from the prefetched items when they are available,
+    otherwise with one aggregate query over the cart items.
+    """
+    prefetched = getattr(cart, "_prefetched_objects_cache", {})
+    if "cartitem_set" in prefetched:
+        return price_items(prefetched["cartitem_set"])
+
+    subtotal_price, items_count = aggregate_items(cart.cartitem_set.all())
+
+    return _build_pricing(subtotal_price, items_count)
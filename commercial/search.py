@@ -0,0 +1,256 @@
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from commercial.cache import get_catalog_cache, get_generation, invalidate_catalog
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TOMBSTONE_KEY = "catalog:deleted:{}"
+TOMBSTONE_TIMEOUT = 24 * 60 * 60
+# Further behind than this, reading the tombstones one by one costs more than rebuilding.
+MAX_SYNC_GENERATIONS = 1000
+
+EXACT_MATCH_WEIGHT = 1.0
+PREFIX_MATCH_WEIGHT = 0.5
+NAME_PREFIX_BONUS = 0.5
+SCORE_WEIGHT = 0.25
+
+
+def fold(text):
+    """Lowercases the text and strips its accents, so "Terra Média" and "terra media" are equal."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+class TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        # Product id -> number of its tokens that go through this node.
+        self.ids = {}
+
+
+class ProductSearchIndex:
+    """
+    In-process inverted index and prefix trie over ``Product.name``.
+
+    The index is built on the first search and then kept up to date incrementally: local product
+    changes are applied when their transaction commits and changes made by other processes are picked up
+    when the catalog generation (see ``commercial.cache``) moves, by reloading only the products updated
+    since the last sync (minus ``SEARCH_SYNC_OVERLAP`` seconds, for transactions that committed late) and
+    removing the products in the tombstones of the generations passed since then.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        self.root = TrieNode()
+        self.tokens = {}
+        self.documents = {}
+        self.max_score = 0
+        self.generation = None
+        self.synced_at = None
+        self.built = False
+
+    def _insert_token(self, token, product_id):
+        node = self.root
+        for char in token:
+            node = node.children.setdefault(char, TrieNode())
+            node.ids[product_id] = node.ids.get(product_id, 0) + 1
+        self.tokens.setdefault(token, set()).add(product_id)
+
+    def _remove_token(self, token, product_id):
+        node = self.root
+        path = []
+        for char in token:
+            path.append((node, char))
+            node = node.children[char]
+            node.ids[product_id] -= 1
+            if not node.ids[product_id]:
+                del node.ids[product_id]
+        for parent, char in reversed(path):
+            if parent.children[char].ids:
+                break
+            del parent.children[char]
+
+        ids = self.tokens[token]
+        ids.discard(product_id)
+        if not ids:
+            del self.tokens[token]
+
+    def add(self, product_id, name, price, score):
+        with self.lock:
+            self.remove(product_id)
+            tokens = set(tokenize(name))
+            for token in tokens:
+                self._insert_token(token, product_id)
+            self.documents[product_id] = {
+                "id": product_id,
+                "name": name,
+                "price": price,
+                "score": score,
+                "folded_name": fold(name),
+                "tokens": tokens,
+            }
+            self.max_score = max(self.max_score, score or 0)
+
+    def remove(self, product_id):
+        with self.lock:
+            document = self.documents.pop(product_id, None)
+            if document:
+                for token in document["tokens"]:
+                    self._remove_token(token, product_id)
+
+    def record_change(self, product, deleted=False):
+        """
+        Invalidates the catalog and applies a product change to the index once its transaction commits,
+        so a rolled back change never reaches the index.
+        """
+        values = (product.pk, product.name, product.price, product.score)
+        pending_generation = invalidate_catalog()
+        transaction.on_commit(
+            lambda: self.apply_local_change(*values, deleted=deleted, pending_generation=pending_generation)
+        )
+
+    def apply_local_change(self, product_id, name=None, price=None, score=None, deleted=False,
+                           pending_generation=None):
+        """
+        Applies a committed product change made by this process and invalidates the catalog again. A deletion
+        leaves a tombstone for the other processes under its own generation, followed by another bump, so a
+        process that synced in between reads the tombstone on its next sync. When no other process moved the
+        generation in the meantime (other than the ``pending_generation`` bump made for this change before the
+        commit), the index stays in sync without a reload.
+        """
+        with self.lock:
+            generation = get_generation()
+            in_sync = self.built and (
+                self.generation == generation
+                or (generation == pending_generation and self.generation == pending_generation - 1)
+            )
+            new_generation = invalidate_catalog()
+            bumps = 1
+            if deleted:
+                get_catalog_cache().set(TOMBSTONE_KEY.format(new_generation), product_id, timeout=TOMBSTONE_TIMEOUT)
+                new_generation = invalidate_catalog()
+                bumps = 2
+            if not self.built:
+                return
+
+            if deleted:
+                self.remove(product_id)
+            else:
+                self.add(product_id, name, price, score)
+            if in_sync and new_generation == generation + bumps:
+                self.generation = new_generation
+
+    def build(self):
+        from commercial.models import Product
+
+        with self.lock:
+            self.clear()
+            self.generation = get_generation()
+            self.synced_at = timezone.now()
+            for product_id, name, price, score in Product.objects.values_list("id", "name", "price", "score"):
+                self.add(product_id, name, price, score)
+            self.built = True
+
+    def sync(self):
+        """Applies the product changes made since the last sync, when the catalog generation moved."""
+        from commercial.models import Product
+
+        generation = get_generation()
+        if not self.built:
+            return self.build()
+        if generation == self.generation:
+            return
+
+        with self.lock:
+            synced_at = timezone.now()
+            expired = synced_at - self.synced_at > timedelta(seconds=TOMBSTONE_TIMEOUT)
+            if expired or not 0 < generation - self.generation <= MAX_SYNC_GENERATIONS:
+                # The generation was reseeded, or the tombstones may have expired.
+                return self.build()
+
+            overlap = timedelta(seconds=getattr(settings, "SEARCH_SYNC_OVERLAP", 60))
+            updated = Product.objects.filter(updated_at__gte=self.synced_at - overlap)
+            for product_id, name, price, score in updated.values_list("id", "name", "price", "score"):
+                self.add(product_id, name, price, score)
+
+            # The generation of the last sync is read again, its tombstone may have been written after it.
+            keys = [TOMBSTONE_KEY.format(index) for index in range(self.generation, generation + 1)]
+            for product_id in get_catalog_cache().get_many(keys).values():
+                self.remove(product_id)
+
+            self.max_score = max((document["score"] or 0 for document in self.documents.values()), default=0)
+            self.generation = generation
+            self.synced_at = synced_at
+
+    def _prefix_ids(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return {}
+
+        return node.ids
+
+    def search(self, query, limit=10):
+        """
+        Returns the products whose name has a word starting with every word of the query,
+        ranked by match quality (exact words over prefixes, names starting with the query first)
+        blended with the product score.
+        """
+        self.sync()
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        with self.lock:
+            candidates = None
+            for token in query_tokens:
+                ids = self._prefix_ids(token)
+                candidates = set(ids) if candidates is None else candidates.intersection(ids)
+                if not candidates:
+                    return []
+
+            folded_query = " ".join(query_tokens)
+            ranked = []
+            for product_id in candidates:
+                document = self.documents[product_id]
+                quality = sum(
+                    EXACT_MATCH_WEIGHT if token in document["tokens"] else PREFIX_MATCH_WEIGHT
+                    for token in query_tokens
+                ) / len(query_tokens)
+                if document["folded_name"].startswith(folded_query):
+                    quality += NAME_PREFIX_BONUS
+                popularity = (document["score"] or 0) / self.max_score if self.max_score else 0
+                ranked.append((quality + SCORE_WEIGHT * popularity, document))
+
+            ranked.sort(key=lambda pair: (-pair[0], pair[1]["folded_name"], pair[1]["id"]))
+
+            return [
+                {
+                    "id": document["id"],
+                    "name": document["name"],
+                    "price": str(document["price"]),
+                    "score": document["score"],
+                    "rank": round(rank, 4),
+                }
+                for rank, document in ranked[:limit]
+            ]
+
+
+product_search_index = ProductSearchIndex()
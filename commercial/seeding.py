@@ -0,0 +1,132 @@
+import math
+import random
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Cart, CartItem, Order, OrderItem, Product
+from commercial.pricing import price_items
+from games_e_commerce.streaming import chunked
+
+ADJECTIVES = (
+    "Super", "Mega", "Legendary", "Dark", "Final", "Eternal", "Crazy", "Galactic", "Tiny", "Mystic",
+    "Ultimate", "Wild", "Ancient", "Neon", "Shadow", "Royal", "Turbo", "Silent", "Infinite", "Golden",
+)
+NOUNS = (
+    "Racer", "Quest", "Legends", "Warriors", "Kart", "Odyssey", "Kingdom", "Soccer", "Dungeon", "Tactics",
+    "Island", "Galaxy", "Fighter", "Empire", "Ninja", "Heroes", "Chronicles", "Arena", "Party", "Frontier",
+)
+MAX_ITEMS = 30
+
+
+def product_name(index):
+    adjective = ADJECTIVES[index % len(ADJECTIVES)]
+    noun = NOUNS[(index // len(ADJECTIVES)) % len(NOUNS)]
+
+    return "{} {} {}".format(adjective, noun, index)
+
+
+def benchmark_username(prefix, index):
+    return "{}_user_{}".format(prefix, index)
+
+
+class BenchmarkSeeder:
+    """
+    Generates benchmark data with ``bulk_create``: users sharing one password, products with search friendly
+    names, carts for a share of the users and orders. Item counts follow a log-normal distribution
+    (most carts and orders have 1 to 4 items, a few have dozens). Names are derived from the row index, so
+    seeding again with the same volumes reuses the existing users and products, and only tops up the carts and
+    orders that are missing.
+    """
+
+    def __init__(self, prefix="bench", password="benchmark", seed=None, batch_size=1000):
+        self.prefix = prefix
+        self.password = password
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+
+    def items_count(self):
+        return min(MAX_ITEMS, max(1, math.floor(self.random.lognormvariate(0.8, 0.7))))
+
+    def seed_users(self, count):
+        password = make_password(self.password)
+        usernames = [benchmark_username(self.prefix, index) for index in range(count)]
+        for batch in chunked(usernames, self.batch_size):
+            User.objects.bulk_create(
+                [User(username=username, password=password) for username in batch],
+                ignore_conflicts=True,
+            )
+
+        return list(User.objects.filter(username__in=usernames).values_list("id", flat=True))
+
+    def seed_products(self, count):
+        names = [product_name(index) for index in range(count)]
+        for batch in chunked(names, self.batch_size):
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        name=name,
+                        price=Decimal(self.random.randint(499, 34999)) / 100,
+                        score=self.random.randint(0, 1000),
+                    )
+                    for name in batch
+                ],
+                ignore_conflicts=True,
+            )
+        invalidate_catalog()
+
+        return list(Product.objects.filter(name__in=names).values_list("id", "price"))
+
+    def _items(self, products):
+        """Random ``(product_id, price, quantity)`` lines, a product picked more than once becoming one line."""
+        picked = Counter(self.random.choices(products, k=self.items_count()))
+
+        return [(product_id, price, quantity) for (product_id, price), quantity in picked.items()]
+
+    def seed_carts(self, user_ids, products):
+        """Creates a cart for each user without one, returning the number of carts created."""
+        with_cart = set(Cart.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+        created = 0
+        for batch in chunked([user_id for user_id in user_ids if user_id not in with_cart], self.batch_size):
+            with transaction.atomic():
+                carts = Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in batch])
+                CartItem.objects.bulk_create(
+                    CartItem(cart=cart, product_id=product_id, price=price, quantity=quantity)
+                    for cart in carts
+                    for product_id, price, quantity in self._items(products)
+                )
+            created += len(carts)
+
+        return created
+
+    def seed_orders(self, count, user_ids, products):
+        """Creates orders until the users have ``count`` of them, returning the number of orders created."""
+        missing = count - Order.objects.filter(user_id__in=user_ids).count()
+        created = 0
+        for batch in chunked(range(max(0, missing)), self.batch_size):
+            orders = []
+            items = []
+            for _ in batch:
+                order = Order(user_id=self.random.choice(user_ids))
+                order_items = [
+                    OrderItem(order=order, product_id=product_id, price=price, quantity=quantity)
+                    for product_id, price, quantity in self._items(products)
+                ]
+                pricing = price_items(order_items)
+                order.freight = pricing.total_freight
+                order.subtotal_price = pricing.subtotal_price
+                order.items_count = pricing.items_count
+                order.total_price = pricing.total_price
+                orders.append(order)
+                items.extend(order_items)
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(items)
+            created += len(orders)
+
+        return created
@@ -1,22 +1,63 @@
-import decimal
-
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from commercial.images import build_srcset, variants_are_current
+from commercial.metrics import cart_items_added
 from commercial.models import Product, CartItem, Cart, OrderItem, Order
+from commercial.writers import BulkPrimaryKeyRelatedField, BulkRelatedListSerializer, NestedItemWriter
+from games_e_commerce.fieldsets import SparseFieldsetsMixin
+
+cart_items_writer = NestedItemWriter(CartItem, "cart", created_counter=cart_items_added)
+order_items_writer = NestedItemWriter(OrderItem, "order")
+
+
+def prefetch_items(instance, related_name):
+    """Loads the items and their products of an instance whose prefetch cache was reset by a write."""
+    if related_name in getattr(instance, "_prefetched_objects_cache", {}):
+        return False
+
+    prefetch_related_objects([instance], related_name, "{}__product".format(related_name))
 
+    return True
 
-class ProductSerializer(serializers.ModelSerializer):
+
+class ProductSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    image_srcset = serializers.SerializerMethodField()
+    # Keys the encoded fragments of the product list (see ``commercial.cache.encoded_fragments``).
+    projection_required = ["updated_at"]
+    projection_sources = {"image_srcset": ["image", "image_variants"]}
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["image_variants"]
+
+    def get_image_srcset(self, obj) -> dict:
+        image_name = obj.image.name if obj.image else None
+        if not variants_are_current(image_name, obj.image_variants):
+            return {}
+
+        request = self.context.get("request")
+        if request is None:
+            return build_srcset(obj.image_variants, default_storage.url)
+
+        return build_srcset(obj.image_variants, lambda name: request.build_absolute_uri(default_storage.url(name)))
+
+
+class ProductSearchResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    price = serializers.DecimalField(max_digits=20, decimal_places=2)
+    score = serializers.IntegerField(allow_null=True)
+    rank = serializers.FloatField()
 
 
 class CartItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), source="product", write_only=True)
     cart_id = serializers.PrimaryKeyRelatedField(queryset=Cart.objects.all(), source="cart", write_only=True)
+    projection_required = ["price", "quantity"]
 
     class Meta:
         model = CartItem
@@ -25,14 +66,16 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 class NestedCartItemSerializer(CartItemSerializer):
     id = serializers.IntegerField(required=False)
+    product_id = BulkPrimaryKeyRelatedField(queryset=Product.objects.all(), source="product", write_only=True)
     cart_id = serializers.PrimaryKeyRelatedField(source="cart", read_only=True)
 
     class Meta:
         model = CartItem
         exclude = ["cart"]
+        list_serializer_class = BulkRelatedListSerializer
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     items = NestedCartItemSerializer(source="cartitem_set", required=False, many=True)
     subtotal_price = serializers.SerializerMethodField()
     total_freight = serializers.SerializerMethodField()
@@ -43,36 +86,48 @@ class CartSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_subtotal_price(self, obj) -> float:
-        return obj.subtotal_price
+        return float(obj.pricing.subtotal_price)
 
     def get_total_freight(self, obj) -> float:
-        return obj.total_freight
+        return float(obj.pricing.total_freight)
 
     def get_total_price(self, obj) -> float:
-        return obj.total_price
+        return float(obj.pricing.total_price)
+
+    def prepare_instance(self, instance):
+        if "items" in self.fields and prefetch_items(instance, "cartitem_set"):
+            instance.reset_pricing()
+
+    def to_representation(self, instance):
+        self.prepare_instance(instance)
+
+        return super().to_representation(instance)
+
+    def validate_user(self, value):
+        request = self.context.get("request")
+        if request is not None and not request.user.is_staff:
+            owners = {value.id} if self.instance is None else {value.id, self.instance.user_id}
+            if owners != {request.user.id}:
+                raise serializers.ValidationError("You can only manage your own cart.")
+
+        moved = self.instance is not None and self.instance.user_id != value.id
+        if moved and Cart.objects.filter(user=value).exists():
+            raise serializers.ValidationError("This user already has a cart.")
+
+        return value
 
     @transaction.atomic
     def create(self, validated_data):
+        """Upserts the single cart of the user: an existing cart has its items replaced by the given ones."""
         items_data = validated_data.pop("cartitem_set", None)
-        instance = super().create(validated_data)
+        instance, created = Cart.get_or_create_for(validated_data["user"])
+
+        if not created:
+            instance.save(update_fields=["updated_at"])
+        if items_data is not None:
+            cart_items_writer.write(instance, items_data, replace=not created)
 
-        if not items_data:
-            return instance
-
-        if items_data:
-            serializer = CartItemSerializer(
-                data=[
-                    {**data, "cart_id": instance.id, "product_id": data.get("product").id}
-                    for data in items_data
-                ],
-                many=True,
-                context=self.context,
-            )
-            try:
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-            except serializers.ValidationError as errors:
-                raise serializers.ValidationError({"items": errors.detail})
+        instance.reset_pricing()
 
         return instance
 
@@ -81,54 +136,43 @@ class CartSerializer(serializers.ModelSerializer):
         items_data = validated_data.pop("cartitem_set", None)
         instance = super().update(instance, validated_data)
 
-        if items_data is None:
-            return instance
-
-        items_ids = [data["id"] for data in items_data if "id" in data]
-        instance.cartitem_set.exclude(id__in=items_ids).delete()
-
-        errors = []
-        for i, data in enumerate(items_data):
-            item_id = data.pop("id", None)
-            try:
-                cart_item = CartItem.objects.get(id=item_id)
-                serializer = CartItemSerializer(
-                    instance=cart_item,
-                    data={**data, "cart_id": instance.id, "product_id": data.get("product").id},
-                    context=self.context,
-                )
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-            except CartItem.DoesNotExist:
-                if item_id is None:
-                    try:
-                        serializer = CartItemSerializer(
-                            data={
-                                **data,
-                                "cart_id": instance.id,
-                                "product_id": data.get("product").id
-                            },
-                            context=self.context,
-                        )
-                        serializer.is_valid(raise_exception=True)
-                        serializer.save()
-                    except serializers.ValidationError as err:
-                        errors.append(err.detail)
-                else:
-                    errors.append({"id": "Item does not exist."})
-            except serializers.ValidationError as err:
-                errors.append(err.detail)
-
-        if len(errors):
-            raise serializers.ValidationError({"items": errors})
+        if items_data is not None:
+            cart_items_writer.write(instance, items_data)
+
+        instance.reset_pricing()
 
         return instance
 
 
+class CartItemsUpdateSerializer(serializers.Serializer):
+    """Batch of item operations on a cart: the ``add`` items are inserted and the ``remove`` ids are deleted."""
+    add = NestedCartItemSerializer(many=True, required=False)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("add") and not attrs.get("remove"):
+            raise serializers.ValidationError("Nothing to add or remove.")
+
+        return attrs
+
+
+class CartTotalsSerializer(serializers.ModelSerializer):
+    """Compact cart representation, with the totals and without the items."""
+    items_count = serializers.IntegerField(read_only=True)
+    subtotal_price = serializers.FloatField(read_only=True)
+    total_freight = serializers.FloatField(read_only=True)
+    total_price = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ["id", "updated_at", "items_count", "subtotal_price", "total_freight", "total_price"]
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), source="product", write_only=True)
     order_id = serializers.PrimaryKeyRelatedField(queryset=Order.objects.all(), source="order", write_only=True)
+    projection_required = ["price", "quantity"]
 
     class Meta:
         model = OrderItem
@@ -137,50 +181,42 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 class NestedOrderItemSerializer(OrderItemSerializer):
     id = serializers.IntegerField(required=False)
+    product_id = BulkPrimaryKeyRelatedField(queryset=Product.objects.all(), source="product", write_only=True)
     order_id = serializers.PrimaryKeyRelatedField(source="order", read_only=True)
 
     class Meta:
         model = OrderItem
         exclude = ["order"]
+        list_serializer_class = BulkRelatedListSerializer
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     items = NestedOrderItemSerializer(source="orderitem_set", required=False, many=True)
-    subtotal_price = serializers.SerializerMethodField()
-    total_price = serializers.SerializerMethodField()
+    subtotal_price = serializers.DecimalField(max_digits=20, decimal_places=2, coerce_to_string=False, read_only=True)
+    items_count = serializers.IntegerField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=20, decimal_places=2, coerce_to_string=False, read_only=True)
 
     class Meta:
         model = Order
         fields = "__all__"
 
-    def get_subtotal_price(self, obj) -> decimal.Decimal:
-        return obj.subtotal_price
+    def prepare_instance(self, instance):
+        if "items" in self.fields:
+            prefetch_items(instance, "orderitem_set")
+
+    def to_representation(self, instance):
+        self.prepare_instance(instance)
 
-    def get_total_price(self, obj) -> decimal.Decimal:
-        return obj.total_price
+        return super().to_representation(instance)
 
     @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop("orderitem_set", None)
         instance = super().create(validated_data)
 
-        if not items_data:
-            return instance
-
-        if items_data:
-            serializer = OrderItemSerializer(
-                data=[
-                    {**data, "order_id": instance.id, "product_id": data.get("product").id}
-                    for data in items_data
-                ],
-                many=True,
-                context=self.context,
-            )
-            try:
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-            except serializers.ValidationError as errors:
-                raise serializers.ValidationError({"items": errors.detail})
+        items = order_items_writer.write(instance, items_data, replace=False) if items_data else []
+
+        instance.refresh_totals(items)
 
         Cart.objects.filter(user=instance.user).delete()
 
@@ -191,45 +227,8 @@ class OrderSerializer(serializers.ModelSerializer):
         items_data = validated_data.pop("orderitem_set", None)
         instance = super().update(instance, validated_data)
 
-        if items_data is None:
-            return instance
-
-        items_ids = [data["id"] for data in items_data if "id" in data]
-        instance.orderitem_set.exclude(id__in=items_ids).delete()
-
-        errors = []
-        for i, data in enumerate(items_data):
-            item_id = data.pop("id", None)
-            try:
-                cart_item = OrderItem.objects.get(id=item_id)
-                serializer = OrderItemSerializer(
-                    instance=cart_item,
-                    data={**data, "order_id": instance.id, "product_id": data.get("product").id},
-                    context=self.context,
-                )
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-            except OrderItem.DoesNotExist:
-                if item_id is None:
-                    try:
-                        serializer = OrderItemSerializer(
-                            data={
-                                **data,
-                                "order_id": instance.id,
-                                "product_id": data.get("product").id
-                            },
-                            context=self.context,
-                        )
-                        serializer.is_valid(raise_exception=True)
-                        serializer.save()
-                    except serializers.ValidationError as err:
-                        errors.append(err.detail)
-                else:
-                    errors.append({"id": "Item does not exist."})
-            except serializers.ValidationError as err:
-                errors.append(err.detail)
-
-        if len(errors):
-            raise serializers.ValidationError({"items": errors})
+        items = order_items_writer.write(instance, items_data) if items_data is not None else None
+
+        instance.refresh_totals(items)
 
         return instance
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from commercial.images import schedule_variants, variants_are_current, variants_enabled
+from commercial.metrics import orders_created
+from commercial.models import Order, Product
+from commercial.search import product_search_index
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    product_search_index.record_change(instance)
+
+    image_name = instance.image.name if instance.image else None
+    if image_name and variants_enabled() and not variants_are_current(image_name, instance.image_variants):
+        transaction.on_commit(lambda: schedule_variants([(instance.pk, image_name)]))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    product_search_index.record_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(orders_created.inc)
@@ -0,0 +1,101 @@
+import json
+import os
+import statistics
+from time import perf_counter
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "performance_baseline.json")
+
+
+class PerformanceTestCase(APITestCase):
+    """
+    Runs endpoints at several data sizes against a query budget and a latency budget.
+
+    Each ``assertBudget`` call fails when the number of queries changes with the data size or exceeds
+    ``max_queries``. Latencies depend on the machine, so they are only checked with ``PERFORMANCE_LATENCY=1``:
+    the call then also fails when the median latency exceeds ``max_latency_ms`` or regresses past the stored
+    baseline (``performance_baseline.json``) by more than ``PERFORMANCE_TOLERANCE`` times (3 by default).
+    Run with ``UPDATE_PERFORMANCE_BASELINE=1`` to store the measured latencies as the new baseline.
+    """
+    sizes = (1, 10, 50)
+    repeat = 5
+    latency_slack_ms = 5
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.update_baseline = os.environ.get("UPDATE_PERFORMANCE_BASELINE") == "1"
+        cls.check_latency = os.environ.get("PERFORMANCE_LATENCY") == "1"
+        cls.tolerance = float(os.environ.get("PERFORMANCE_TOLERANCE", 3))
+        try:
+            with open(BASELINE_PATH) as baseline_file:
+                cls.baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            cls.baseline = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_baseline:
+            with open(BASELINE_PATH, "w") as baseline_file:
+                json.dump(cls.baseline, baseline_file, indent=2, sort_keys=True)
+                baseline_file.write("\n")
+        super().tearDownClass()
+
+    def measure(self, setup, request, before_each=None):
+        """
+        Returns ``{size: (queries, median latency in ms)}``. ``setup(size)`` creates the data of a size and
+        returns what ``request(context)`` needs; ``before_each(context)`` runs before every request, untimed.
+        The data of each size is rolled back before the next one.
+        """
+        measurements = {}
+        for size in self.sizes:
+            with transaction.atomic():
+                context = setup(size)
+                queries = set()
+                latencies = []
+                for _ in range(self.repeat):
+                    if before_each is not None:
+                        before_each(context)
+                    with CaptureQueriesContext(connection) as captured:
+                        start = perf_counter()
+                        response = request(context)
+                        latencies.append((perf_counter() - start) * 1000)
+                    self.assertLess(response.status_code, 300, response.content[:500])
+                    queries.add(len(captured))
+                transaction.set_rollback(True)
+
+            self.assertEqual(len(queries), 1, "The queries vary between runs of size {}: {}.".format(size, queries))
+            measurements[size] = (queries.pop(), statistics.median(latencies))
+
+        return measurements
+
+    def assertBudget(self, name, measurements, max_queries, max_latency_ms):
+        queries = {size: measured_queries for size, (measured_queries, _) in measurements.items()}
+        latencies = {str(size): round(latency, 2) for size, (_, latency) in measurements.items()}
+
+        self.assertEqual(len(set(queries.values())), 1, "{} queries grow with the data size: {}.".format(name, queries))
+        self.assertLessEqual(max(queries.values()), max_queries, "{} is over its query budget.".format(name))
+
+        if self.update_baseline:
+            self.baseline[name] = latencies
+            return
+        if not self.check_latency:
+            return
+
+        self.assertLessEqual(
+            max(latency for _, latency in measurements.values()),
+            max_latency_ms,
+            "{} is over its latency budget: {}ms.".format(name, latencies),
+        )
+
+        for size, latency in latencies.items():
+            baseline = self.baseline.get(name, {}).get(size)
+            if baseline is not None:
+                self.assertLessEqual(
+                    latency,
+                    baseline * self.tolerance + self.latency_slack_ms,
+                    "{} regressed at size {}: {}ms, baseline {}ms.".format(name, size, latency, baseline),
+                )
@@ -0,0 +1,86 @@
+import json
+import random
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase
+
+from commercial.benchmark import BenchmarkRunner, InProcessTransport, VirtualUser, percentile
+from commercial.models import Cart, Order, Product
+
+
+class StubTransport:
+    def request(self, method, path, data=None, token=None):
+        return 200, json.dumps({"access": "token"}).encode()
+
+    def close(self):
+        pass
+
+
+class BenchmarkTestCase(TestCase):
+    def _seed(self, **options):
+        call_command("seed_benchmark", seed=1, stdout=StringIO(), **options)
+
+    def test_seed_benchmark(self):
+        products_count = Product.objects.count()
+
+        self._seed(users=20, products=50, cart_ratio=0.5, orders=30)
+        self._seed(users=20, products=50, cart_ratio=0.5, orders=30)
+
+        self.assertEqual(User.objects.filter(username__startswith="bench_user_").count(), 20)
+        self.assertEqual(Product.objects.count(), products_count + 50)
+        self.assertEqual(Cart.objects.count(), 10)
+        self.assertEqual(Order.objects.count(), 30)
+        orders = Order.objects.annotate(
+            items=Sum("orderitem__quantity"),
+            prices=Sum(F("orderitem__price") * F("orderitem__quantity")),
+        )
+        for order in orders:
+            self.assertEqual(order.items_count, order.items)
+            self.assertEqual(order.subtotal_price, order.prices)
+            self.assertEqual(order.total_price, order.subtotal_price + order.freight)
+
+        self._seed(users=20, products=50, cart_ratio=0.5, orders=40)
+
+        self.assertEqual(Order.objects.count(), 40)
+
+    def test_virtual_user_actions(self):
+        self._seed(users=1, products=20, cart_ratio=0, orders=0)
+        user = User.objects.get(username="bench_user_0")
+        product_ids = list(Product.objects.values_list("id", flat=True))
+        virtual_user = VirtualUser(InProcessTransport(), user.username, "benchmark", user.id, product_ids,
+                                   random.Random(1))
+
+        virtual_user.login()
+
+        for action in ("browse", "search", "get_cart", "add_to_cart", "add_to_cart", "get_cart", "checkout"):
+            self.assertLess(getattr(virtual_user, action)(), 400, action)
+        self.assertEqual(Order.objects.get(user=user).items_count, 2)
+
+    def test_runner_report(self):
+        runner = BenchmarkRunner(
+            StubTransport(),
+            [("user", "password", 1)],
+            [1],
+            concurrency=2,
+            requests=40,
+            workload={"browse": 1, "search": 1},
+            seed=1,
+        )
+
+        report = runner.run()
+
+        self.assertEqual(report["total"]["requests"], 40)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual(sum(endpoint["requests"] for endpoint in report["endpoints"].values()), 40)
+        self.assertIsNotNone(report["endpoints"]["browse"]["p99_ms"])
+
+    def test_percentile(self):
+        latencies = list(range(1, 101))
+
+        self.assertEqual(percentile(latencies, 0.5), 50)
+        self.assertEqual(percentile(latencies, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertIsNone(percentile([], 0.5))
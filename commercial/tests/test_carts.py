@@ -2,6 +2,8 @@ import json
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
@@ -89,6 +91,119 @@ class CartTestCase(APITestCase):
         self.assertEqual("id" in data.keys(), True)
         self.assertEqual(data["total_freight"], 0)
 
+    def test_cart_creation_upserts_the_user_cart(self):
+        other_product = Product.objects.create(name="other product", price=10.00, score=100)
+        body = {
+            "user": self.user.id,
+            "items": [
+                {"product_id": other_product.id}
+            ]
+        }
+
+        api_response = self.api_client.post(
+            path=self.url,
+            data=json.dumps(body),
+            json=True,
+            content_type="application/json"
+        )
+        data = api_response.data
+
+        self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(data["id"], self.cart.id)
+        self.assertEqual([item["product"]["id"] for item in data["items"]], [other_product.id])
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 1)
+        other_product.delete()
+
+    def test_second_cart_is_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Cart.objects.create(user=self.user)
+
+    def test_cart_patch_to_user_with_cart(self):
+        other_user = User.objects.create_user(username="other", password="123456")
+        other_cart = Cart.objects.create(user=other_user)
+        self.user.is_staff = True
+        self.user.save()
+
+        api_response = self.api_client.patch(
+            path="{}{}/".format(self.url, other_cart.id),
+            data=json.dumps({"user": self.user.id}),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(api_response.data["user"], ["This user already has a cart."])
+        other_user.delete()
+
+    def test_cart_of_another_user_is_not_upserted(self):
+        other_user = User.objects.create_user(username="other", password="123456")
+        other_cart = Cart.objects.create(user=other_user)
+        CartItem.objects.create(cart=other_cart, product=self.product, quantity=3)
+
+        api_response = self.api_client.post(
+            path=self.url,
+            data=json.dumps({"user": other_user.id, "items": []}),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("user", api_response.data)
+        self.assertEqual(other_cart.cartitem_set.get().quantity, 3)
+
+        for body in ({"user": self.user.id}, {"items": []}):
+            api_response = self.api_client.patch(
+                path="{}{}/".format(self.url, other_cart.id),
+                data=json.dumps(body),
+                json=True,
+                content_type="application/json"
+            )
+
+            self.assertEqual(api_response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertEqual(other_cart.cartitem_set.get().quantity, 3)
+
+        api_response = self.api_client.patch(
+            path="{}{}/".format(self.url, self.cart.id),
+            data=json.dumps({"user": other_user.id}),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(api_response.data["user"], ["You can only manage your own cart."])
+        other_user.delete()
+
+    def test_cart_quantity_pricing(self):
+        self.cart_item.quantity = 2
+        self.cart_item.save()
+
+        api_response = self.api_client.get(path="{}get-cart/".format(self.url), json=True)
+        data = api_response.data
+
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data["subtotal_price"], float(self.product.price) * 2)
+        # Over the free freight threshold once the quantity is counted.
+        self.assertEqual(data["total_freight"], 0)
+        self.assertEqual(Cart.objects.get(id=self.cart.id).items_count, 2)
+
+    def test_cart_item_quantity_must_be_positive(self):
+        body = {
+            "user": self.user.id,
+            "items": [
+                {"product_id": self.product.id, "quantity": 0}
+            ]
+        }
+
+        api_response = self.api_client.put(
+            path="{}{}/".format(self.url, self.cart.id),
+            data=json.dumps(body),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("quantity", api_response.data["items"][0])
+
     def test_cart_put(self):
         body = {
             "user": self.user.id,
@@ -106,7 +221,9 @@ class CartTestCase(APITestCase):
         data = api_response.data
 
         self.assertEqual(api_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(data["items"]), 2)
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data["subtotal_price"], float(self.product.price) * 2)
 
     def test_cart_patch(self):
         body = {
@@ -124,7 +241,9 @@ class CartTestCase(APITestCase):
         data = api_response.data
 
         self.assertEqual(api_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(data["items"]), 2)
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data["subtotal_price"], float(self.product.price) * 2)
 
     def test_cart_retrieve(self):
         api_response = self.api_client.get(path="{}get-cart/".format(self.url), json=True)
@@ -137,3 +256,182 @@ class CartTestCase(APITestCase):
         api_response = self.api_client.delete(path="{}delete-cart/".format(self.url), json=True)
 
         self.assertEqual(api_response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_cart_retrieve_query_count(self):
+        for items_count in (1, 10):
+            CartItem.objects.bulk_create(
+                CartItem(cart=self.cart, product=self.product, price=self.product.price)
+                for _ in range(items_count - self.cart.cartitem_set.count())
+            )
+
+            with self.assertNumQueries(4):
+                api_response = self.api_client.get(path="{}get-cart/".format(self.url), json=True)
+
+            self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(api_response.data["items"]), items_count)
+            self.assertEqual(api_response.data["subtotal_price"], float(self.product.price) * items_count)
+
+    def test_cart_put_query_count(self):
+        for items_count in (5, 50):
+            body = {
+                "user": self.user.id,
+                "items": [{"id": self.cart_item.id, "product_id": self.product.id}] + [
+                    {"product_id": self.product.id, "price": index + 1} for index in range(items_count - 1)
+                ]
+            }
+
+            with self.assertNumQueries(14):
+                api_response = self.api_client.put(
+                    path="{}{}/".format(self.url, self.cart.id),
+                    data=json.dumps(body),
+                    json=True,
+                    content_type="application/json"
+                )
+
+            self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(api_response.data["items"]), items_count)
+
+    def test_cart_put_with_invalid_items(self):
+        body = {
+            "user": self.user.id,
+            "items": [
+                {"product_id": self.product.id},
+                {"id": 0, "product_id": self.product.id}
+            ]
+        }
+        api_response = self.api_client.put(
+            path="{}{}/".format(self.url, self.cart.id),
+            data=json.dumps(body),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(api_response.data["items"], [{"id": "Item does not exist."}])
+        self.assertEqual(self.cart.cartitem_set.count(), 1)
+
+    def test_cart_retrieve_not_modified(self):
+        api_response = self.api_client.get(path="{}get-cart/".format(self.url), json=True)
+        etag = api_response["ETag"]
+
+        with self.assertNumQueries(1):
+            api_response = self.api_client.get(path="{}get-cart/".format(self.url), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(api_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        CartItem.objects.create(cart=self.cart, product=self.product)
+        api_response = self.api_client.get(path="{}get-cart/".format(self.url), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(api_response["ETag"], etag)
+
+    def test_cart_retrieve_sparse_fieldsets(self):
+        with self.assertNumQueries(4):
+            api_response = self.api_client.get(
+                path="{}get-cart/".format(self.url),
+                data={"fields": "id,total_price,items.product.name", "exclude": "items.id"},
+                json=True
+            )
+        data = api_response.data
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(data.keys()), {"id", "total_price", "items"})
+        self.assertEqual(data["items"], [{"product": {"name": self.product.name}}])
+        self.assertEqual(data["total_price"], float(self.product.price) + float(settings.FREIGHT_PRICE))
+
+        api_response = self.api_client.get(path="{}get-cart/".format(self.url), data={"fields": "id"}, json=True)
+
+        self.assertEqual(api_response.data, {"id": self.cart.id})
+
+    def test_cart_add_items(self):
+        with CaptureQueriesContext(connection) as queries:
+            api_response = self.api_client.post(
+                path="{}{}/items/".format(self.url, self.cart.id),
+                data=json.dumps({"product_id": self.product.id}),
+                json=True,
+                content_type="application/json"
+            )
+
+        # The cart is locked before its lines are read, so concurrent additions are serialized.
+        locked = [query["sql"] for query in queries if query["sql"].endswith("FOR UPDATE")]
+        self.assertEqual(len(locked), 1)
+        self.assertIn('FROM "commercial_cart"', locked[0])
+        self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(api_response.data["items"]), 1)
+        self.assertEqual(api_response.data["items"][0]["id"], self.cart_item.id)
+        self.assertEqual(api_response.data["items"][0]["quantity"], 2)
+
+    def test_cart_add_items_compact_query_count(self):
+        for items_count in (1, 20):
+            # The entries at the product price add to the existing line, the others make new lines.
+            body = [{"product_id": self.product.id} for _ in range(items_count)] + [
+                {"product_id": self.product.id, "price": index + 1} for index in range(items_count)
+            ]
+
+            with self.assertNumQueries(9):
+                api_response = self.api_client.post(
+                    path="{}{}/items/?compact=true".format(self.url, self.cart.id),
+                    data=json.dumps(body),
+                    json=True,
+                    content_type="application/json"
+                )
+
+            items = list(self.cart.cartitem_set.all())
+            self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
+            self.assertNotIn("items", api_response.data)
+            self.assertEqual(api_response.data["items_count"], sum(item.quantity for item in items))
+            self.assertEqual(
+                api_response.data["subtotal_price"], float(sum(item.price * item.quantity for item in items))
+            )
+        self.assertEqual(self.cart.cartitem_set.get(id=self.cart_item.id).quantity, 22)
+
+    def test_cart_update_items(self):
+        body = {
+            "add": [{"product_id": self.product.id}, {"product_id": self.product.id}],
+            "remove": [self.cart_item.id]
+        }
+
+        api_response = self.api_client.patch(
+            path="{}{}/items/?compact=true".format(self.url, self.cart.id),
+            data=json.dumps(body),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(api_response.data["items_count"], 2)
+        self.assertEqual(self.cart.cartitem_set.filter(id=self.cart_item.id).exists(), False)
+
+        api_response = self.api_client.patch(
+            path="{}{}/items/".format(self.url, self.cart.id),
+            data=json.dumps({}),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cart_remove_item(self):
+        path = "{}{}/items/{}/".format(self.url, self.cart.id, self.cart_item.id)
+
+        api_response = self.api_client.delete(path=path)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(api_response.data["items"], [])
+        self.assertEqual(api_response.data["total_price"], 0)
+        self.assertEqual(self.api_client.delete(path=path).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cart_items_of_another_user(self):
+        other_user = User.objects.create_user(username="other", password="123456")
+        other_cart = Cart.objects.create(user=other_user)
+
+        api_response = self.api_client.post(
+            path="{}{}/items/".format(self.url, other_cart.id),
+            data=json.dumps({"product_id": self.product.id}),
+            json=True,
+            content_type="application/json"
+        )
+
+        self.assertEqual(api_response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(other_cart.cartitem_set.exists(), False)
+        other_user.delete()
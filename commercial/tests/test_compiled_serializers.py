@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from commercial.models import Product, Cart, CartItem, Order, OrderItem
+from commercial.serializers import ProductSerializer, CartSerializer, OrderSerializer
+from games_e_commerce.compiled import CompiledSerializer
+
+
+class CompiledSerializerTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+
+        self.product = Product.objects.create(
+            name="Terra Média",
+            price=200.00,
+            score=500,
+            image="images/terra-media.png"
+        )
+        self.product_without_score = Product.objects.create(name="test product", price=10.555)
+
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, product=self.product)
+        CartItem.objects.create(cart=self.cart, product=self.product_without_score)
+
+        self.order = Order.objects.create(user=self.user, freight=Decimal(settings.FREIGHT_PRICE))
+        OrderItem.objects.create(order=self.order, product=self.product)
+        OrderItem.objects.create(order=self.order, product=self.product_without_score, price=1)
+        self.order.refresh_totals()
+
+        self.factory = APIRequestFactory()
+
+    def tearDown(self):
+        self.user.delete()
+        self.product.delete()
+        self.product_without_score.delete()
+
+    def _assert_equivalent(self, serializer_class, instance, many=False, query=None):
+        request = Request(self.factory.get("/", data=query or {}))
+        context = {"request": request}
+
+        expected = JSONRenderer().render(serializer_class(instance, many=many, context=context).data)
+        compiled = JSONRenderer().render(CompiledSerializer(serializer_class(context=context), instance, many).data)
+
+        self.assertEqual(compiled, expected)
+
+    def test_product_equivalence(self):
+        self._assert_equivalent(ProductSerializer, self.product)
+        self._assert_equivalent(ProductSerializer, Product.objects.all(), many=True)
+        self._assert_equivalent(ProductSerializer, Product.objects.all(), many=True, query={"fields": "id,price"})
+
+    def test_cart_equivalence(self):
+        self._assert_equivalent(CartSerializer, Cart.objects.get(id=self.cart.id))
+        self._assert_equivalent(
+            CartSerializer,
+            Cart.objects.prefetch_related("cartitem_set__product").get(id=self.cart.id),
+            query={"exclude": "items.product.image,created_at"}
+        )
+
+    def test_order_equivalence(self):
+        self._assert_equivalent(OrderSerializer, Order.objects.get(id=self.order.id))
+        self._assert_equivalent(OrderSerializer, Order.objects.all(), many=True, query={"fields": "id,items.price"})
@@ -0,0 +1,132 @@
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.models import Product, Order, OrderItem
+from games_e_commerce.streaming import accepts_gzip
+
+
+class ExportTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+        self.other_user = User.objects.create_user(username="other", password="123456")
+        self.product = Product.objects.create(name="test product", price=10.50, score=500)
+
+        self.orders = []
+        for user in (self.user, self.user, self.other_user):
+            order = Order.objects.create(user=user, freight=Decimal(settings.FREIGHT_PRICE))
+            OrderItem.objects.create(order=order, product=self.product)
+            OrderItem.objects.create(order=order, product=self.product, price=1)
+            order.refresh_totals()
+            self.orders.append(order)
+        Order.objects.create(user=self.user, freight=Decimal(settings.FREIGHT_PRICE)).refresh_totals()
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+        self.other_user.delete()
+        self.product.delete()
+
+    def _export(self, url, query=None, **headers):
+        response = self.api_client.get(url, query or {}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        return response, b"".join(response.streaming_content)
+
+    def test_products_ndjson_export(self):
+        response, content = self._export("/commercial/api/products/export/")
+        lines = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        self.assertEqual(len(lines), Product.objects.count())
+        self.assertEqual(lines[-1]["name"], "test product")
+        self.assertEqual(lines[-1]["price"], "10.50")
+
+    def test_orders_csv_export(self):
+        _, content = self._export("/commercial/api/orders/export/", {"output": "csv"})
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row["user_id"] for row in rows}, {str(self.user.id)})
+        self.assertEqual(rows[0]["product_name"], "test product")
+        self.assertEqual(rows[0]["total_price"], "21.50")
+        self.assertEqual(rows[0]["quantity"], "1")
+        self.assertEqual(rows[-1]["item_id"], "")
+
+    def test_orders_export_for_staff_includes_every_user(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        _, content = self._export("/commercial/api/orders/export/")
+        orders = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(len(orders), 4)
+        self.assertEqual([len(order["items"]) for order in orders], [2, 2, 2, 0])
+
+    def test_export_date_range(self):
+        Order.objects.filter(id=self.orders[0].id).update(created_at=timezone.now() - timezone.timedelta(days=10))
+        created_after = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+
+        _, content = self._export("/commercial/api/orders/export/", {"created_after": created_after})
+        orders = [json.loads(line) for line in content.splitlines()]
+
+        self.assertNotIn(self.orders[0].id, [order["id"] for order in orders])
+        self.assertEqual(len(orders), 2)
+
+        response = self.api_client.get("/commercial/api/orders/export/", {"created_before": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_gzipped_export(self):
+        response, content = self._export(
+            "/commercial/api/products/export/",
+            {"output": "csv"},
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+        )
+        rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode())))
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(rows[0], ["id", "name", "price", "score", "image", "created_at", "updated_at"])
+        self.assertEqual(len(rows), Product.objects.count() + 1)
+
+    def test_export_not_gzipped_when_refused(self):
+        for accept_encoding in ("gzip;q=0, deflate", "br, *;q=0", "identity"):
+            response, content = self._export(
+                "/commercial/api/products/export/",
+                {"output": "csv"},
+                HTTP_ACCEPT_ENCODING=accept_encoding,
+            )
+
+            self.assertNotIn("Content-Encoding", response)
+            self.assertTrue(content.startswith(b"id,name,price"))
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("deflate, gzip;q=0.5"))
+        self.assertTrue(accepts_gzip("br, *"))
+        self.assertFalse(accepts_gzip("gzip;q=0, *"))
+        self.assertFalse(accepts_gzip("gzip; q=0.000"))
+        self.assertFalse(accepts_gzip(""))
+
+    def test_invalid_output(self):
+        response = self.api_client.get("/commercial/api/products/export/", {"output": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.management import call_command
+from PIL import Image
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.images import generate_variants, render_variants
+from commercial.models import Product
+
+
+class ImageVariantsTestCase(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        # The background thread could not see the data of the test transaction.
+        self.settings_override = self.settings(
+            MEDIA_ROOT=self.media, IMAGE_VARIANT_WIDTHS=[64, 160, 640], IMAGE_VARIANTS_IN_BACKGROUND=False
+        )
+        self.settings_override.enable()
+
+        self.assets = os.path.join(settings.BASE_DIR, "commercial", "statics", "assets")
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media)
+        self.user.delete()
+
+    def _create_product(self, name, image):
+        product = Product(name=name, price=10, score=1)
+        with open(os.path.join(self.assets, image), "rb") as image_file:
+            product.image.save(image, File(image_file), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
+
+        return product
+
+    def test_render_variants(self):
+        with open(os.path.join(self.assets, "fifa-18.png"), "rb") as image_file:
+            variants = render_variants(image_file.read(), [64, 160, 640], ["webp", "jpeg"])
+
+        # The 180px wide source is never upscaled.
+        self.assertEqual([(variant_format, width) for variant_format, width, _ in variants], [
+            ("webp", 64), ("jpeg", 64), ("webp", 160), ("jpeg", 160), ("webp", 180), ("jpeg", 180),
+        ])
+        for variant_format, width, content in variants:
+            with Image.open(io.BytesIO(content)) as image:
+                self.assertEqual(image.format, variant_format.upper())
+                self.assertEqual(image.size, (width, width))
+
+    def test_variants_are_generated_on_save(self):
+        product = self._create_product("variant product", "fifa-18.png")
+
+        self.assertEqual(product.image_variants["source"], product.image.name)
+        self.assertEqual(sorted(product.image_variants["webp"], key=int), ["64", "160", "180"])
+        for name in product.image_variants["jpeg"].values():
+            self.assertRegex(name, r"^images/variants/\d+w\.[0-9a-f]{16}\.jpg$")
+            self.assertTrue(os.path.exists(os.path.join(self.media, name)))
+
+        data = self.api_client.get("/commercial/api/products/{}/".format(product.id)).data
+        self.assertEqual(data["image_srcset"]["webp"].count("w, "), 2)
+        self.assertTrue(data["image_srcset"]["jpeg"].startswith("http://testserver"))
+        self.assertTrue(data["image_srcset"]["jpeg"].endswith(" 180w"))
+
+    def test_variants_are_generated_in_background(self):
+        with self.settings(IMAGE_VARIANTS_IN_BACKGROUND=True), \
+                mock.patch("commercial.images.get_background") as get_background:
+            product = self._create_product("variant product", "fifa-18.png")
+
+        self.assertEqual(product.image_variants, {})
+        get_background.return_value.submit.assert_called_once()
+        (_, products), _ = get_background.return_value.submit.call_args
+        self.assertEqual(products, [(product.id, product.image.name)])
+
+        generate_variants(products, inline=True)
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants["source"], product.image.name)
+
+    def test_stale_variants_are_not_exposed(self):
+        product = self._create_product("variant product", "fifa-18.png")
+        product.image = "images/other.png"
+        product.save()
+
+        data = self.api_client.get("/commercial/api/products/{}/".format(product.id)).data
+        self.assertEqual(data["image_srcset"], {})
+
+    def test_variants_are_generated_on_import(self):
+        feed = os.path.join(self.media, "products.json")
+        with open(feed, "w") as feed_file:
+            json.dump([{"name": "imported variant product", "price": 1, "score": 1, "image": "fifa-18.png"}], feed_file)
+
+        call_command("import_products", feed, images_dir=self.assets, stdout=io.StringIO())
+
+        product = Product.objects.get(name="imported variant product")
+        self.assertEqual(product.image_variants["source"], product.image.name)
+        self.assertEqual(len(product.image_variants["webp"]), 3)
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from commercial.importers import ProductImporter
+from commercial.models import Product
+
+
+class ImportProductsTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.media = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media)
+        self.settings_override.enable()
+
+        self.assets = os.path.join(settings.BASE_DIR, "commercial", "statics", "assets")
+        self.product = Product.objects.create(name="test product", price=10.50, score=500, image="images/test.png")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.media)
+
+    def _write_feed(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as feed:
+            feed.write(content)
+
+        return path
+
+    def _import(self, *args, stderr=None, **options):
+        stdout = StringIO()
+        call_command("import_products", *args, stdout=stdout, stderr=stderr or StringIO(), **options)
+
+        return stdout.getvalue()
+
+    def test_json_feed(self):
+        path = self._write_feed("products.json", json.dumps([
+            {"name": "Imported Mario", "price": 197.88, "score": 100, "image": "super-mario-odyssey.png"},
+            {"name": "Imported Fifa", "price": 49.9, "score": None, "image": "fifa-18.png"},
+        ], indent=2))
+
+        output = self._import(path, images_dir=self.assets)
+
+        mario = Product.objects.get(name="Imported Mario")
+        self.assertEqual(mario.price, Decimal("197.88"))
+        self.assertRegex(mario.image.name, r"^images/super-mario-odyssey\.[0-9a-f]{16}\.png$")
+        self.assertTrue(os.path.exists(os.path.join(self.media, mario.image.name)))
+        self.assertIsNone(Product.objects.get(name="Imported Fifa").score)
+        self.assertIn("Imported 2 products", output)
+        self.assertFalse(os.path.exists("{}.checkpoint".format(path)))
+
+    def test_ndjson_feed_updates_products_by_name(self):
+        path = self._write_feed("products.ndjson", "\n".join([
+            json.dumps({"name": "test product", "price": 20, "score": 600}),
+            json.dumps({"name": "new product", "price": 5, "score": 1}),
+            json.dumps({"name": "new product", "price": 6, "score": 2}),
+        ]))
+        products_count = Product.objects.count()
+
+        self._import(path)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal("20.00"))
+        self.assertEqual(self.product.score, 600)
+        self.assertEqual(self.product.image.name, "images/test.png")
+        self.assertEqual(Product.objects.get(name="new product").price, Decimal("6.00"))
+        self.assertEqual(Product.objects.count(), products_count + 1)
+
+    def test_ndjson_feed_skips_malformed_lines(self):
+        path = self._write_feed("products.ndjson", "\n".join([
+            json.dumps({"name": "ndjson product", "price": 5}),
+            "",
+            '{"name": "truncated product", "price"',
+            json.dumps({"name": "last ndjson product", "price": 6}),
+        ]))
+        stdout = StringIO()
+        stderr = StringIO()
+
+        call_command("import_products", path, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Product.objects.filter(name__in=["ndjson product", "last ndjson product"]).count(), 2)
+        self.assertIn("Skipping record 2: Malformed JSON on line 3", stderr.getvalue())
+        self.assertIn("1 invalid records", stdout.getvalue())
+
+    def test_csv_feed_skips_invalid_records(self):
+        path = self._write_feed("products.csv", "name,price,score,image\ncsv product,12.5,3,\n,1,1,\nbad price,abc,1,\n")
+
+        output = self._import(path)
+
+        self.assertEqual(Product.objects.get(name="csv product").price, Decimal("12.50"))
+        self.assertFalse(Product.objects.filter(name="bad price").exists())
+        self.assertIn("2 invalid records", output)
+
+    def test_csv_feed_skips_malformed_rows(self):
+        oversized = '"{}"'.format("x" * (csv.field_size_limit() + 1))
+        path = self._write_feed(
+            "products.csv", "name,price,score,image\n{},1,1,\nlast csv product,2,1,\n".format(oversized)
+        )
+        stderr = StringIO()
+
+        output = self._import(path, stderr=stderr)
+
+        self.assertTrue(Product.objects.filter(name="last csv product").exists())
+        self.assertIn("Skipping record 1: Malformed CSV row", stderr.getvalue())
+        self.assertIn("1 invalid records", output)
+
+    def test_unknown_format(self):
+        path = self._write_feed("products.txt", "")
+
+        with self.assertRaises(CommandError):
+            self._import(path)
+
+    def test_resume_after_interruption(self):
+        path = self._write_feed("products.ndjson", "\n".join(
+            json.dumps({"name": "resumed product {}".format(index), "price": index}) for index in range(3)
+        ))
+
+        with mock.patch.object(ProductImporter, "import_batch", side_effect=[0, RuntimeError("interrupted")]):
+            with self.assertRaises(RuntimeError):
+                self._import(path, batch_size=1)
+        with open("{}.checkpoint".format(path)) as checkpoint:
+            self.assertEqual(json.load(checkpoint)["offset"], 1)
+
+        output = self._import(path, batch_size=1, resume=True)
+
+        self.assertIn("Resuming after record 1.", output)
+        self.assertEqual(
+            list(Product.objects.filter(name__startswith="resumed").order_by("name").values_list("name", flat=True)),
+            ["resumed product 1", "resumed product 2"],
+        )
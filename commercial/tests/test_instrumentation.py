@@ -0,0 +1,87 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Product
+from games_e_commerce.instrumentation import RequestTimings, sql_shape
+
+
+class RequestTimingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+        invalidate_catalog()
+
+    def tearDown(self):
+        self.user.delete()
+
+    def _timings(self, response):
+        return dict(re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"]))
+
+    def test_server_timing_header(self):
+        with self.settings(REQUEST_TIMING_HEADER=True):
+            response = self.api_client.get("/commercial/api/products/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self._timings(response)), {"db", "serialize", "render", "total"})
+        queries = int(re.search(r"\"(\d+) queries\"", response["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+
+    def test_server_timing_header_of_regular_serializers(self):
+        product = Product.objects.create(name="timed product", price=10.00)
+
+        with self.settings(REQUEST_TIMING_HEADER=True, COMPILED_SERIALIZERS=False):
+            response = self.api_client.patch(
+                "/commercial/api/products/{}/".format(product.id), data={"price": 12.00}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("serialize", self._timings(response))
+
+    def test_sampling(self):
+        with self.settings(REQUEST_TIMING_SAMPLE_RATE=0):
+            response = self.api_client.get("/commercial/api/products/")
+
+        self.assertNotIn("Server-Timing", response)
+
+    def test_server_timing_header_can_be_turned_off(self):
+        with self.settings(REQUEST_TIMING_HEADER=False):
+            response = self.api_client.get("/commercial/api/products/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_slow_requests_are_logged(self):
+        with self.settings(SLOW_REQUEST_MS=0), self.assertLogs("games_e_commerce.instrumentation") as logs:
+            self.api_client.get("/commercial/api/products/")
+
+        self.assertIn("Slow request GET /commercial/api/products/ (200)", logs.output[0])
+
+    def test_repeated_queries(self):
+        timings = RequestTimings()
+        with connection.execute_wrapper(timings):
+            for product in Product.objects.all()[:3]:
+                Product.objects.get(pk=product.pk)
+
+        self.assertEqual(timings.queries, 4)
+        self.assertEqual(len(timings.repeated_queries()), 1)
+        self.assertEqual(timings.repeated_queries()[0][0], 3)
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            sql_shape("SELECT * FROM product WHERE id IN (%s, %s, %s) LIMIT 21"),
+            "SELECT * FROM product WHERE id IN (...) LIMIT ?",
+        )
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+
+from games_e_commerce.media import IMMUTABLE_CACHE_CONTROL, UnsatisfiableRange, parse_range
+
+
+class MediaDeliveryTestCase(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.media)
+        self.settings_override.enable()
+
+        self.content = bytes(range(256)) * 4
+        self.name = default_storage.save("images/cover.png", ContentFile(self.content))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media)
+
+    def _get(self, name, **headers):
+        return self.client.get("/media/{}".format(name), **headers)
+
+    def test_uploads_are_named_by_content(self):
+        self.assertRegex(self.name, r"^images/cover\.[0-9a-f]{16}\.png$")
+        self.assertEqual(default_storage.save("images/cover.png", ContentFile(self.content)), self.name)
+        self.assertNotEqual(default_storage.save("images/cover.png", ContentFile(b"other")), self.name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "images"))), 2)
+
+    def test_long_names_keep_their_hash(self):
+        name = default_storage.save("images/{}.png".format("a" * 120), ContentFile(self.content), max_length=100)
+
+        self.assertEqual(len(name), 100)
+        self.assertRegex(name, r"^images/a+\.[0-9a-f]{16}\.png$")
+        self.assertEqual(self._get(name)["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+    def test_hashed_names_are_immutable(self):
+        response = self._get(self.name)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self._get(self.name, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unhashed_names_are_revalidated(self):
+        with open(os.path.join(self.media, "legacy.png"), "wb") as legacy:
+            legacy.write(self.content)
+
+        response = self._get("legacy.png")
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+    def test_range_requests(self):
+        response = self._get(self.name, HTTP_RANGE="bytes=10-19")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self._get(self.name, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+        response = self._get(self.name, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE="\"stale\"")
+        self.assertEqual(response.status_code, 200)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=-100", 1024), (924, 1023))
+        self.assertEqual(parse_range("bytes=1000-5000", 1024), (1000, 1023))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1024))
+        with self.assertRaises(UnsatisfiableRange):
+            parse_range("bytes=5-1", 1024)
+
+    def test_offload(self):
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self._get(self.name)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/{}".format(self.name))
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+        with self.settings(MEDIA_SENDFILE_HEADER="X-Sendfile"):
+            response = self._get(self.name)
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.media, self.name))
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self._get("images/missing.png").status_code, 404)
+        self.assertEqual(self._get("../settings.py").status_code, 404)
@@ -0,0 +1,122 @@
+import json
+import re
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Product
+from games_e_commerce.metrics import registry
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+        self.product = Product.objects.create(name="test product", price=200.00, score=500)
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+        self.product.delete()
+
+    def _get_metrics(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+    def _sample(self, name, **labels):
+        text = self._get_metrics().content.decode()
+        label_pattern = ",".join("{}=\"{}\"".format(label, value) for label, value in labels.items())
+        pattern = r"^{}{} (\S+)$".format(re.escape(name), re.escape("{" + label_pattern + "}") if labels else "")
+        match = re.search(pattern, text, re.MULTILINE)
+
+        return float(match.group(1)) if match else 0.0
+
+    def test_exposition(self):
+        response = self._get_metrics()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE http_request_duration_seconds histogram", response.content.decode())
+
+    def test_request_latency_per_action(self):
+        labels = {"view": "CartViewSet.get_cart", "method": "GET"}
+        count = self._sample("http_request_duration_seconds_count", **labels)
+        buckets = self._sample("http_request_duration_seconds_bucket", **labels, le="+Inf")
+        queries = self._sample("http_request_db_queries_count", view="CartViewSet.get_cart")
+
+        self.api_client.get("/commercial/api/carts/get-cart/")
+
+        self.assertEqual(self._sample("http_request_duration_seconds_count", **labels), count + 1)
+        self.assertEqual(self._sample("http_request_duration_seconds_bucket", **labels, le="+Inf"), buckets + 1)
+        self.assertEqual(self._sample("http_request_db_queries_count", view="CartViewSet.get_cart"), queries + 1)
+
+    def test_business_counters(self):
+        orders = self._sample("orders_created_total")
+        items = self._sample("cart_items_added_total")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_client.post("/commercial/api/carts/", data={
+                "user": self.user.id,
+                "items": [{"product_id": self.product.id}, {"product_id": self.product.id}],
+            }, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_client.post("/commercial/api/orders/create-order-through-cart/")
+
+        self.assertEqual(self._sample("cart_items_added_total"), items + 2)
+        self.assertEqual(self._sample("orders_created_total"), orders + 1)
+
+    def test_cache_hit_ratio(self):
+        invalidate_catalog()
+        self.api_client.get("/commercial/api/products/")
+        self.api_client.get("/commercial/api/products/")
+
+        self.assertGreater(self._sample("catalog_cache_lookups_total", cache="response", result="hit"), 0)
+        self.assertGreater(self._sample("catalog_cache_hit_ratio", cache="response"), 0)
+
+    def test_values_of_every_process_are_summed(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with self.settings(METRICS_DIR=directory):
+                orders = self._sample("orders_created_total")
+                with open("{}/metrics-0-worker.json".format(directory), "w") as metrics_file:
+                    json.dump({"orders_created_total": {"[]": 3}}, metrics_file)
+
+                self.assertEqual(self._sample("orders_created_total"), orders + 3)
+        finally:
+            registry.path = None
+            shutil.rmtree(directory)
+
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self._get_metrics().status_code, 200)
+
+    def test_without_token_only_in_debug(self):
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            with self.settings(DEBUG=True):
+                self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_queries_of_unsampled_requests_are_not_recorded(self):
+        labels = {"view": "CartViewSet.get_cart", "method": "GET"}
+        count = self._sample("http_request_duration_seconds_count", **labels)
+        queries = self._sample("http_request_db_queries_count", view="CartViewSet.get_cart")
+
+        with self.settings(REQUEST_TIMING_SAMPLE_RATE=0):
+            self.api_client.get("/commercial/api/carts/get-cart/")
+
+        self.assertEqual(self._sample("http_request_duration_seconds_count", **labels), count + 1)
+        self.assertEqual(self._sample("http_request_db_queries_count", view="CartViewSet.get_cart"), queries)
@@ -1,4 +1,5 @@
 import json
+from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -38,7 +39,7 @@ class OrderTestCase(APITestCase):
 
         self.cart_item = CartItem.objects.create(cart=self.cart, product=self.product)
 
-        self.order = Order.objects.create(user=self.user, freight=settings.FREIGHT_PRICE)
+        self.order = Order.objects.create(user=self.user, freight=Decimal(settings.FREIGHT_PRICE))
 
         self.order_item = OrderItem.objects.create(order=self.order, product=self.product)
 
@@ -73,6 +74,9 @@ class OrderTestCase(APITestCase):
 
         self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
         self.assertEqual("id" in data.keys(), True)
+        self.assertEqual(data["items_count"], 1)
+        self.assertEqual(float(data["subtotal_price"]), float(self.product.price))
+        self.assertEqual(float(data["total_price"]), float(self.product.price) + float(settings.FREIGHT_PRICE))
 
     def test_order_creation_through_cart(self):
         api_response = self.api_client.post(path="{}create-order-through-cart/".format(self.url), json=True)
@@ -80,6 +84,36 @@ class OrderTestCase(APITestCase):
 
         self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
         self.assertEqual("id" in data.keys(), True)
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(float(data["freight"]), float(settings.FREIGHT_PRICE))
+        self.assertEqual(float(data["total_price"]), float(self.product.price) + float(settings.FREIGHT_PRICE))
+        self.assertEqual(Cart.objects.filter(user=self.user).exists(), False)
+
+    def test_order_creation_through_cart_keeps_quantities(self):
+        self.cart_item.quantity = 3
+        self.cart_item.save()
+
+        api_response = self.api_client.post(path="{}create-order-through-cart/".format(self.url), json=True)
+        data = api_response.data
+
+        self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item["quantity"] for item in data["items"]], [3])
+        self.assertEqual(data["items_count"], 3)
+        self.assertEqual(float(data["subtotal_price"]), float(self.product.price) * 3)
+
+    def test_order_creation_through_cart_query_count(self):
+        Cart.objects.filter(user=self.user).delete()
+        for items_count in (1, 20):
+            cart = Cart.objects.create(user=self.user)
+            CartItem.objects.bulk_create(
+                CartItem(cart=cart, product=self.product, price=self.product.price) for _ in range(items_count)
+            )
+
+            with self.assertNumQueries(11):
+                api_response = self.api_client.post(path="{}create-order-through-cart/".format(self.url), json=True)
+
+            self.assertEqual(api_response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(api_response.data["items_count"], items_count)
 
     def test_order_put(self):
         body = {
@@ -99,7 +133,9 @@ class OrderTestCase(APITestCase):
         data = api_response.data
 
         self.assertEqual(api_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(data["items"]), 2)
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data["items_count"], 2)
 
     def test_order_patch(self):
         body = {
@@ -117,7 +153,9 @@ class OrderTestCase(APITestCase):
         data = api_response.data
 
         self.assertEqual(api_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(data["items"]), 2)
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data["items_count"], 2)
 
     def test_order_retrieve(self):
         api_response = self.api_client.get(path="{}{}/".format(self.url, self.order.id), json=True)
@@ -130,3 +168,46 @@ class OrderTestCase(APITestCase):
         api_response = self.api_client.delete(path="{}{}/".format(self.url, self.order.id), json=True)
 
         self.assertEqual(api_response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_order_list_query_count(self):
+        for orders_count in (1, 10):
+            for _ in range(orders_count - Order.objects.filter(user=self.user).count()):
+                order = Order.objects.create(user=self.user)
+                OrderItem.objects.create(order=order, product=self.product)
+                order.refresh_totals()
+
+            with self.assertNumQueries(5):
+                api_response = self.api_client.get(path=self.url, json=True)
+
+            self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(api_response.data["results"]), orders_count)
+
+    def test_order_put_query_count(self):
+        for items_count in (5, 50):
+            body = {
+                "user": self.user.id,
+                "freight": 0,
+                "items": [{"id": self.order_item.id, "product_id": self.product.id}] + [
+                    {"product_id": self.product.id, "price": index + 1} for index in range(items_count - 1)
+                ]
+            }
+
+            with self.assertNumQueries(15):
+                api_response = self.api_client.put(
+                    path="{}{}/".format(self.url, self.order.id),
+                    data=json.dumps(body),
+                    json=True,
+                    content_type="application/json"
+                )
+
+            self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(api_response.data["items"]), items_count)
+            self.assertEqual(api_response.data["items_count"], items_count)
+
+    def test_order_retrieve_not_modified(self):
+        path = "{}{}/".format(self.url, self.order.id)
+        api_response = self.api_client.get(path=path, json=True)
+
+        api_response = self.api_client.get(path=path, HTTP_IF_NONE_MATCH=api_response["ETag"])
+
+        self.assertEqual(api_response.status_code, status.HTTP_304_NOT_MODIFIED)
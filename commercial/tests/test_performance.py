@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Cart, CartItem, Order, OrderItem, Product
+from commercial.tests.performance import PerformanceTestCase
+
+
+class EndpointPerformanceTestCase(PerformanceTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+
+    def _create_products(self, size):
+        return Product.objects.bulk_create(
+            Product(name="performance product {}".format(index), price=Decimal(index + 1), score=index)
+            for index in range(size)
+        )
+
+    def _create_cart(self, size):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, price=product.price) for product in self._create_products(size)
+        )
+
+        return cart
+
+    def test_product_list(self):
+        def setup(size):
+            self._create_products(size)
+            return size
+
+        measurements = self.measure(
+            setup,
+            lambda size: self.api_client.get("/commercial/api/products/", {"page_size": size}),
+            before_each=lambda size: invalidate_catalog(),
+        )
+
+        self.assertBudget("product_list", measurements, max_queries=3, max_latency_ms=250)
+
+    def test_get_cart(self):
+        measurements = self.measure(
+            self._create_cart,
+            lambda cart: self.api_client.get("/commercial/api/carts/get-cart/"),
+        )
+
+        self.assertBudget("get_cart", measurements, max_queries=4, max_latency_ms=250)
+
+    def test_order_list(self):
+        def setup(size):
+            products = self._create_products(2)
+            orders = Order.objects.bulk_create(
+                Order(user=self.user, freight=Decimal(settings.FREIGHT_PRICE)) for _ in range(size)
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=product, price=product.price)
+                for order in orders
+                for product in products
+            )
+            return size
+
+        measurements = self.measure(
+            setup,
+            lambda size: self.api_client.get("/commercial/api/orders/", {"page_size": size}),
+        )
+
+        self.assertBudget("order_list", measurements, max_queries=5, max_latency_ms=250)
+
+    def test_checkout(self):
+        def setup(size):
+            return self._create_products(size)
+
+        def before_each(products):
+            cart = Cart.objects.create(user=self.user)
+            CartItem.objects.bulk_create(CartItem(cart=cart, product=product, price=product.price) for product in products)
+
+        measurements = self.measure(
+            setup,
+            lambda products: self.api_client.post("/commercial/api/orders/create-order-through-cart/"),
+            before_each=before_each,
+        )
+
+        self.assertBudget("checkout", measurements, max_queries=11, max_latency_ms=250)
+
+    def test_growing_query_count_fails(self):
+        with self.assertRaisesRegex(AssertionError, "grow with the data size"):
+            self.assertBudget("n_plus_one", {1: (3, 1.0), 10: (12, 1.0)}, max_queries=20, max_latency_ms=100)
@@ -1,8 +1,14 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
+from commercial.cache import catalog_cache_stats, invalidate_catalog
 from commercial.models import Product
+from commercial.search import ProductSearchIndex, fold
 
 
 class ProductTestCase(APITestCase):
@@ -92,3 +98,168 @@ class ProductTestCase(APITestCase):
         api_response = self.api_client.delete(path="{}{}/".format(self.url, self.product.id), json=True)
 
         self.assertEqual(api_response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_product_list_cache(self):
+        stats = catalog_cache_stats()
+        self.api_client.get(path=self.url, json=True)
+
+        with self.assertNumQueries(0):
+            api_response = self.api_client.get(path=self.url, json=True)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(catalog_cache_stats()["hits"], stats["hits"] + 1)
+        self.assertEqual(catalog_cache_stats()["misses"], stats["misses"] + 1)
+
+        # The image URLs are absolute, so https responses are cached apart from the http ones.
+        self.api_client.get(path=self.url, json=True, secure=True)
+        self.assertEqual(catalog_cache_stats()["misses"], stats["misses"] + 2)
+
+        self.api_client.get(path=self.url, data={"name": self.product.name}, json=True)
+        self.api_client.patch(path="{}{}/".format(self.url, self.product.id), data={"price": 99.90}, json=True)
+        api_response = self.api_client.get(path=self.url, data={"name": self.product.name}, json=True)
+
+        self.assertEqual(float(api_response.data["results"][0]["price"]), 99.90)
+
+    def test_product_list_not_modified(self):
+        api_response = self.api_client.get(path=self.url, json=True)
+        etag = api_response["ETag"]
+
+        api_response = self.api_client.get(path=self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(api_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.api_client.patch(path="{}{}/".format(self.url, self.product.id), data={"price": 1.00}, json=True)
+        api_response = self.api_client.get(path=self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+
+    def test_product_list_has_no_last_modified(self):
+        api_response = self.api_client.get(path=self.url, json=True)
+        self.assertNotIn("Last-Modified", api_response)
+
+        # A delete leaves max(updated_at) as it was, so If-Modified-Since must not answer 304 for the list.
+        last_modified = self.api_client.get(path="{}{}/".format(self.url, self.product.id))["Last-Modified"]
+        Product.objects.create(name="test product to delete", price=5.00).delete()
+        api_response = self.api_client.get(path=self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+
+    def test_product_list_cursor_pagination(self):
+        Product.objects.create(name="test product without score", price=5.00)
+        Product.objects.create(name="another test product without score", price=6.00)
+
+        for ordering in ("-score", "score"):
+            products = Product.objects.order_by(ordering, ordering.replace("score", "id"))
+            expected = list(products.values_list("id", flat=True))
+
+            pages = []
+            next_link = "{}?pagination=cursor&ordering={}&page_size=2".format(self.url, ordering)
+            while next_link:
+                data = self.api_client.get(path=next_link, json=True).data
+                self.assertEqual("count" in data.keys(), False)
+                pages.append([product["id"] for product in data["results"]])
+                previous_link, next_link = data["links"]["previous"], data["links"]["next"]
+
+            self.assertEqual(sum(pages, []), expected)
+
+            while previous_link:
+                pages.pop()
+                data = self.api_client.get(path=previous_link, json=True).data
+                self.assertEqual([product["id"] for product in data["results"]], pages[-1])
+                previous_link = data["links"]["previous"]
+
+    def test_product_list_page_size_cap(self):
+        api_response = self.api_client.get(path=self.url, data={"page_size": 10 ** 6, "count": "true"}, json=True)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(api_response.data["count"], Product.objects.count())
+
+    def test_product_search(self):
+        Product.objects.create(name="Terra Média: Sombras de Guerra", price=150.00, score=300)
+        Product.objects.create(name="Terraria", price=20.00, score=100)
+
+        api_response = self.api_client.get(path="{}search/".format(self.url), data={"q": "terra MEDIA"}, json=True)
+        data = api_response.data
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(data[0]["name"], "Terra Média: Sombras de Guerra")
+        self.assertEqual(all("media" in fold(product["name"]) for product in data), True)
+
+        api_response = self.api_client.get(path="{}search/".format(self.url), data={"q": "terr"}, json=True)
+        names = [product["name"] for product in api_response.data]
+
+        self.assertEqual("Terraria" in names, True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(name="Terraria").delete()
+
+        with self.assertNumQueries(0):
+            api_response = self.api_client.get(path="{}search/".format(self.url), data={"q": "terr"}, json=True)
+
+        self.assertEqual("Terraria" in [product["name"] for product in api_response.data], False)
+
+    def test_product_search_sync_from_other_process(self):
+        Product.objects.create(name="Quuxaria", price=20.00, score=100)
+        other_process_index = ProductSearchIndex()
+        self.assertEqual([product["name"] for product in other_process_index.search("quux")], ["Quuxaria"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(name="Quuxaria").delete()
+
+        # Only the updated products are read, the deletion comes from its tombstone.
+        with self.assertNumQueries(1):
+            self.assertEqual(other_process_index.search("quux"), [])
+
+        # A transaction that committed after the sync, with an older ``updated_at``.
+        late = Product.objects.create(name="Quux Nil", price=20.00, score=100)
+        Product.objects.filter(id=late.id).update(updated_at=other_process_index.synced_at - timedelta(seconds=30))
+        invalidate_catalog()
+
+        self.assertEqual([product["id"] for product in other_process_index.search("quux")], [late.id])
+
+    def test_product_search_ignores_rolled_back_changes(self):
+        Product.objects.create(name="Quuxaria", price=20.00, score=100)
+        self.api_client.get(path="{}search/".format(self.url), data={"q": "quux"}, json=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Product.objects.create(name="Quux Nil", price=20.00, score=100)
+                    Product.objects.filter(name="Quuxaria").delete()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+
+        api_response = self.api_client.get(path="{}search/".format(self.url), data={"q": "quux"}, json=True)
+
+        self.assertEqual([product["name"] for product in api_response.data], ["Quuxaria"])
+
+    def test_product_list_range_filters_and_facets(self):
+        api_response = self.api_client.get(
+            path=self.url,
+            data={"max_price": 100, "min_score": 100, "facets": "true"},
+            json=True
+        )
+        data = api_response.data
+        expected = Product.objects.filter(price__lte=100, score__gte=100)
+
+        self.assertEqual(api_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(data["count"], expected.count())
+        self.assertEqual(sum(band["count"] for band in data["facets"]["price"]), expected.count())
+        self.assertEqual(data["facets"]["price"][0]["count"], expected.filter(price__lt=50).count())
+        self.assertEqual(data["facets"]["score"][3]["count"], expected.filter(score__gte=300).count())
+
+    def test_product_list_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            api_response = self.api_client.get(
+                path=self.url,
+                data={"fields": "id,name,price", "name": self.product.name},
+                json=True
+            )
+
+        self.assertEqual(
+            api_response.data["results"],
+            [{"id": self.product.id, "name": "test product", "price": "10.50"}]
+        )
+        select = [query["sql"] for query in queries if query["sql"].startswith('SELECT "commercial_product"."id"')]
+        self.assertEqual('"commercial_product"."image"' in select[-1], False)
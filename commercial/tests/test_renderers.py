@@ -0,0 +1,101 @@
+import datetime
+import io
+import json
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.models import Product
+from games_e_commerce import renderers
+from games_e_commerce.renderers import EncodedJSON, FastJSONParser, FastJSONRenderer
+
+
+class FastJSONRendererTestCase(APITestCase):
+    data = OrderedDict([
+        ("id", 1),
+        ("name", "Terra Média  "),
+        ("price", Decimal("10.50")),
+        ("created_at", datetime.datetime(2023, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc)),
+        ("date", datetime.date(2023, 1, 2)),
+        ("items", [{"score": None}, {1: True}]),
+    ])
+
+    def test_same_output_as_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+
+        self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_same_output_as_json_renderer_with_indent(self):
+        expected = JSONRenderer().render(self.data, "application/json; indent=4")
+
+        self.assertEqual(FastJSONRenderer().render(self.data, "application/json; indent=4"), expected)
+
+    def test_encoded_fragments_are_spliced(self):
+        data = {"results": [EncodedJSON(b'{"id":1}'), EncodedJSON(b'{"id":2}')], "count": 2}
+
+        self.assertEqual(FastJSONRenderer().render(data), b'{"results":[{"id":1},{"id":2}],"count":2}')
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), b'{"results":[{"id":1},{"id":2}],"count":2}')
+        self.assertEqual(json.loads(FastJSONRenderer().render(data, "application/json; indent=4")), {
+            "results": [{"id": 1}, {"id": 2}],
+            "count": 2,
+        })
+
+    def test_parser(self):
+        parsed = FastJSONParser().parse(io.BytesIO('{"name": "Terra Média", "price": 10.5}'.encode()))
+
+        self.assertEqual(parsed, {"name": "Terra Média", "price": 10.5})
+
+
+class ProductFragmentCacheTestCase(APITestCase):
+    url = "/commercial/api/products/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+        self.products = [
+            Product.objects.create(name="product {}".format(index), price=10 + index, score=index)
+            for index in range(3)
+        ]
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+
+    def test_unchanged_products_are_not_encoded_again(self):
+        query = {"ordering": "-score", "max_score": 2}
+        with mock.patch("commercial.cache.dumps", wraps=renderers.dumps) as dumps:
+            first = self.api_client.get(self.url, query)
+            self.assertEqual(dumps.call_count, 3)
+
+            product = self.products[-1]
+            product.name = "renamed product"
+            product.save()
+            second = self.api_client.get(self.url, query)
+            self.assertEqual(dumps.call_count, 4)
+
+        self.assertEqual(first.json()["results"][1:], second.json()["results"][1:])
+        self.assertEqual(second.json()["results"][0]["name"], "renamed product")
+        self.assertEqual(second.data["results"][0]["name"], "renamed product")
+
+    def test_disabled_fragment_cache(self):
+        with self.settings(FRAGMENT_CACHE=False), mock.patch("commercial.cache.dumps") as dumps:
+            response = self.api_client.get(self.url, {"ordering": "-score", "max_score": 2})
+
+        dumps.assert_not_called()
+        self.assertEqual([item["name"] for item in response.data["results"]], ["product 2", "product 1", "product 0"])
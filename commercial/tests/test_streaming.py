@@ -0,0 +1,113 @@
+import json
+import tracemalloc
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from commercial.cache import invalidate_catalog
+from commercial.models import Product, Order, OrderItem
+
+
+class StreamingListTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="123456",
+            email="test@testing.com"
+        )
+        self.product = Product.objects.create(name="test product", price=10.50, score=500)
+
+        self.api_client = APIClient()
+        tokens = self.api_client.post(path="/authentication/api/token/", data={
+            "username": "test",
+            "password": "123456"
+        }).data
+        self.api_client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens.get("access", None))
+
+    def tearDown(self):
+        self.user.delete()
+        self.product.delete()
+
+    def _stream(self, url, query):
+        response = self.api_client.get(url, query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        return json.loads(b"".join(response.streaming_content))
+
+    def _create_products(self, count):
+        start = Product.objects.filter(name__startswith="streamed product").count()
+        Product.objects.bulk_create([
+            Product(name="streamed product {}".format(index), price=index, score=index)
+            for index in range(start, start + count)
+        ])
+
+    def test_streamed_products_match_paginated_response(self):
+        self._create_products(30)
+        query = {"ordering": "price", "page_size": 20, "page": 2, "facets": "true"}
+
+        expected = self.api_client.get("/commercial/api/products/", query).json()
+        streamed = self._stream("/commercial/api/products/", {**query, "stream": "true"})
+
+        self.assertEqual(streamed["count"], expected["count"])
+        self.assertEqual(streamed["total_pages"], expected["total_pages"])
+        self.assertEqual(streamed["results"], expected["results"])
+        self.assertEqual(streamed["facets"], expected["facets"])
+        self.assertEqual(streamed["links"], expected["links"] | {
+            "previous": expected["links"]["previous"] + "&stream=true",
+        })
+
+    def test_streamed_orders_include_items(self):
+        for _ in range(3):
+            order = Order.objects.create(user=self.user, freight=Decimal(settings.FREIGHT_PRICE))
+            OrderItem.objects.create(order=order, product=self.product)
+            order.refresh_totals()
+
+        streamed = self._stream("/commercial/api/orders/", {"stream": "true"})
+
+        self.assertEqual(streamed["count"], 3)
+        self.assertEqual([len(order["items"]) for order in streamed["results"]], [1, 1, 1])
+        self.assertEqual(streamed["results"][0]["items"][0]["product"]["name"], "test product")
+
+    def test_streaming_page_size_is_not_capped_by_max_page_size(self):
+        self._create_products(30)
+
+        with self.settings(MAX_PAGE_SIZE=10):
+            streamed = self._stream("/commercial/api/products/", {"stream": "true", "page_size": 1000})
+
+        self.assertEqual(len(streamed["results"]), Product.objects.count())
+
+    def test_streaming_memory_is_bounded(self):
+        """
+        Benchmark: the peak memory of a streamed page stays flat as the number of rows grows,
+        while the one of a regular page grows with it.
+        """
+        url = "/commercial/api/products/"
+
+        def peak_memory(query):
+            invalidate_catalog()
+            tracemalloc.start()
+            response = self.api_client.get(url, query)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            return peak
+
+        with self.settings(FRAGMENT_CACHE=False, MAX_PAGE_SIZE=100000):
+            self._create_products(1000)
+            streamed_small = peak_memory({"stream": "true", "page_size": 100000})
+            regular_small = peak_memory({"page_size": 100000})
+
+            self._create_products(4000)
+            streamed_large = peak_memory({"stream": "true", "page_size": 100000})
+            regular_large = peak_memory({"page_size": 100000})
+
+        self.assertLess(streamed_large, streamed_small * 1.5)
+        self.assertGreater(regular_large, regular_small * 3)
+        self.assertLess(streamed_large, regular_large / 3)
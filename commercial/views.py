@@ -1,37 +1,209 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, mixins, serializers, filters, status
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import viewsets, mixins, filters, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
+from commercial.cache import CatalogCacheMixin, FragmentCacheMixin, cached_catalog_value, catalog_cache_stats
+from commercial.checkout import checkout_cart
+from commercial.exports import orders_export, products_export
+from commercial.filters import ProductFilter, product_facets
 from commercial.models import Cart, Product, Order
-from commercial.serializers import CartSerializer, ProductSerializer, OrderSerializer
-
-
-class ProductViewSet(viewsets.ModelViewSet):
+from commercial.search import product_search_index
+from commercial.serializers import (
+    CartItemsUpdateSerializer,
+    CartSerializer,
+    CartTotalsSerializer,
+    NestedCartItemSerializer,
+    OrderSerializer,
+    ProductSearchResultSerializer,
+    ProductSerializer,
+    cart_items_writer,
+)
+from games_e_commerce.compiled import CompiledSerializerViewMixin
+from games_e_commerce.fieldsets import SparseFieldsetsViewMixin
+from games_e_commerce.streaming import StreamingListMixin
+from games_e_commerce.utils import ConditionalGetMixin, ConditionalListRetrieveMixin
+
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        "output",
+        OpenApiTypes.STR,
+        enum=["ndjson", "csv"],
+        description="Export format, `ndjson` by default.",
+    ),
+    OpenApiParameter("created_after", OpenApiTypes.DATETIME, description="Only rows created at or after this time."),
+    OpenApiParameter("created_before", OpenApiTypes.DATETIME, description="Only rows created before this time."),
+]
+CART_ITEMS_PARAMETERS = [
+    OpenApiParameter(
+        "compact",
+        OpenApiTypes.BOOL,
+        description="Answer with the cart totals only, without the items.",
+    ),
+]
+
+
+class ProductViewSet(
+    FragmentCacheMixin,
+    CompiledSerializerViewMixin,
+    SparseFieldsetsViewMixin,
+    ConditionalListRetrieveMixin,
+    CatalogCacheMixin,
+    StreamingListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     ordering_fields = ["name", "price", "score"]
-    filterset_fields = ["name", "price", "score"]
-
-
-class CartViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
+    filterset_class = ProductFilter
+
+    def paginate_queryset(self, queryset):
+        self.filtered_queryset = queryset
+
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get("facets", "").lower() in ("1", "true"):
+            response.data["facets"] = product_facets(self.filtered_queryset)
+
+        return response
+
+    def get_conditional_validator(self, queryset, related=None):
+        return cached_catalog_value(
+            self.request,
+            "validator:{}".format(self.action),
+            lambda: super(ProductViewSet, self).get_conditional_validator(queryset, related),
+            pk=self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", OpenApiTypes.STR, description="Text to search, matched by word prefixes."),
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Maximum number of results (up to 50)."),
+        ],
+        responses=ProductSearchResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], url_path="search", filter_backends=[], pagination_class=None)
+    def search(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        return Response(product_search_index.search(request.query_params.get("q", ""), limit))
+
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses={200: OpenApiTypes.BINARY})
+    @action(detail=False, methods=["get"], url_path="export", filter_backends=[], pagination_class=None)
+    def export(self, request):
+        return products_export.response(request, Product.objects.all())
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(catalog_cache_stats())
+
+
+class CartViewSet(
+    CompiledSerializerViewMixin,
+    SparseFieldsetsViewMixin,
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.GenericViewSet,
+):
     queryset = Cart.objects.all().prefetch_related("cartitem_set", "cartitem_set__product")
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
+    compiled_actions = ("get_cart",)
+
+    def get_queryset(self):
+        """The cart of the user; staff users can manage the carts of every user."""
+        queryset = super().get_queryset()
+        if self.request.user.is_staff:
+            return queryset
+
+        return queryset.filter(user=self.request.user)
 
     @action(detail=False, methods=["get"], url_path="get-cart")
     def get_cart(self, request):
-        queryset = self.get_queryset().filter(user=request.user).order_by("-created_at").first()
+        return self.conditional_response(
+            request,
+            Cart.objects.filter(user=request.user),
+            lambda: self._get_cart_response(request),
+            related=("cartitem", "cartitem__product"),
+        )
+
+    def _get_cart_response(self, request):
+        queryset = self.get_queryset().filter(user=request.user).first()
 
         if not queryset:
             return Response({"error": "There isn't cart data for this user."}, status=status.HTTP_404_NOT_FOUND)
 
         return Response(self.get_serializer(queryset).data)
 
+    def _get_user_cart(self, pk):
+        """
+        The cart of the user, locked until the transaction ends: the item actions read its lines before writing
+        them, so concurrent additions of the same new product would otherwise both insert a line.
+        """
+        return get_object_or_404(Cart.objects.select_for_update(), pk=pk, user=self.request.user)
+
+    def _cart_items_response(self, cart, response_status=status.HTTP_200_OK):
+        """The updated cart, or only its totals (priced with one aggregate query) when ``?compact=true``."""
+        cart.save(update_fields=["updated_at"])
+        cart.reset_pricing()
+        if self.request.query_params.get("compact", "").lower() in ("1", "true"):
+            return Response(CartTotalsSerializer(cart).data, status=response_status)
+
+        return Response(self.get_serializer(cart).data, status=response_status)
+
+    @extend_schema(
+        parameters=CART_ITEMS_PARAMETERS,
+        request=NestedCartItemSerializer(many=True),
+        responses={201: CartSerializer},
+    )
+    @action(detail=True, methods=["post"], url_path="items")
+    def add_items(self, request, pk=None):
+        """Adds one item (an object) or several (a list) to the cart, without touching the existing items."""
+        data = request.data if isinstance(request.data, list) else [request.data]
+
+        with transaction.atomic():
+            cart = self._get_user_cart(pk)
+            serializer = NestedCartItemSerializer(data=data, many=True)
+            serializer.is_valid(raise_exception=True)
+            cart_items_writer.add(cart, serializer.validated_data)
+            return self._cart_items_response(cart, status.HTTP_201_CREATED)
+
+    @extend_schema(parameters=CART_ITEMS_PARAMETERS, request=CartItemsUpdateSerializer, responses=CartSerializer)
+    @add_items.mapping.patch
+    def update_items(self, request, pk=None):
+        """Applies a batch of item operations; ids to remove that are no longer in the cart are ignored."""
+        with transaction.atomic():
+            cart = self._get_user_cart(pk)
+            serializer = CartItemsUpdateSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            cart_items_writer.remove(cart, serializer.validated_data.get("remove"))
+            cart_items_writer.add(cart, serializer.validated_data.get("add", []))
+            return self._cart_items_response(cart)
+
+    @extend_schema(parameters=CART_ITEMS_PARAMETERS, request=None, responses=CartSerializer)
+    @action(detail=True, methods=["delete"], url_path=r"items/(?P<item_id>\d+)")
+    def remove_item(self, request, pk=None, item_id=None):
+        with transaction.atomic():
+            cart = self._get_user_cart(pk)
+            if not cart_items_writer.remove(cart, [item_id]):
+                return Response({"error": "Item does not exist."}, status=status.HTTP_404_NOT_FOUND)
+            return self._cart_items_response(cart)
+
     @action(detail=False, methods=["delete"], url_path="delete-cart")
     def delete_cart(self, request):
         queryset = self.get_queryset().filter(user=request.user)
@@ -44,11 +216,18 @@ class CartViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, viewsets.Gen
         return Response({"message": "Cart deleted."}, status=status.HTTP_204_NO_CONTENT)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(
+    CompiledSerializerViewMixin,
+    SparseFieldsetsViewMixin,
+    ConditionalListRetrieveMixin,
+    StreamingListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Order.objects.all().prefetch_related("orderitem_set", "orderitem_set__product")
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ["user", "created_at"]
+    cursor_ordering = "-created_at"
 
     def get_queryset(self):
         return super().get_queryset().filter(user=self.request.user)
@@ -56,22 +235,17 @@ class OrderViewSet(viewsets.ModelViewSet):
     @extend_schema(request=None)
     @action(detail=False, methods=["post"], url_path="create-order-through-cart")
     def create_order_through_cart(self, request):
-        cart_queryset = Cart.objects.filter(user=request.user).order_by("-created_at").first()
+        order = checkout_cart(request.user)
 
-        if not cart_queryset:
+        if not order:
             return Response({"error": "There isn't cart data for this user."}, status=status.HTTP_404_NOT_FOUND)
 
-        data = {
-            "user": self.request.user.id,
-            "items": list(cart_queryset.cartitem_set.all().values("product_id", "price")),
-            "freight": cart_queryset.total_freight
-        }
+        return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
 
-        order_serializer = self.get_serializer(data=data)
-        try:
-            order_serializer.is_valid(raise_exception=True)
-            order_serializer.save()
-        except serializers.ValidationError as errors:
-            raise serializers.ValidationError({"order": errors.detail})
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses={200: OpenApiTypes.BINARY})
+    @action(detail=False, methods=["get"], url_path="export", filter_backends=[], pagination_class=None)
+    def export(self, request):
+        """Exports the orders of the user with their items; staff users export the orders of every user."""
+        queryset = Order.objects.all() if request.user.is_staff else Order.objects.filter(user=request.user)
 
-        return Response(order_serializer.data, status=status.HTTP_201_CREATED)
+        return orders_export.response(request, queryset)
@@ -0,0 +1,196 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves its value from the instances bulk loaded by
+    ``BulkRelatedListSerializer`` instead of running one query per item.
+    """
+
+    def to_internal_value(self, data):
+        list_serializer = getattr(self.parent, "parent", None)
+        loaded = getattr(list_serializer, "loaded_related", {}).get(self.field_name)
+        if loaded is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        try:
+            return loaded[pk]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class BulkRelatedListSerializer(serializers.ListSerializer):
+    """Loads every ``BulkPrimaryKeyRelatedField`` of the items with one ``IN`` query per field."""
+
+    def to_internal_value(self, data):
+        self.loaded_related = {}
+        if isinstance(data, list):
+            for field in self.child.fields.values():
+                if not isinstance(field, BulkPrimaryKeyRelatedField) or field.read_only:
+                    continue
+
+                pks = set()
+                for item in data:
+                    value = item.get(field.field_name) if isinstance(item, dict) else None
+                    if isinstance(value, bool):
+                        continue
+                    try:
+                        pks.add(int(value))
+                    except (TypeError, ValueError):
+                        continue
+
+                self.loaded_related[field.field_name] = field.get_queryset().in_bulk(pks)
+
+        return super().to_internal_value(data)
+
+
+class NestedItemWriter:
+    """
+    Writes the nested items of a parent instance (e.g. the cart items of a cart) as a diff:
+    existing items are loaded with one query and the changes are applied with one delete,
+    one ``bulk_update`` and one ``bulk_create``.
+
+    Items are lines of ``quantity`` units: new entries with the same product and price as another line
+    (e.g. a product repeated by clients that send one entry per unit) add to its quantity instead of
+    creating a row.
+
+    Errors are raised in the ``{"items": [...]}`` shape, with one entry per failing item.
+    The ``created_counter`` metric, if any, counts the added units once the transaction commits.
+    """
+
+    def __init__(self, model, parent_field, fields=("product", "price", "quantity"), created_counter=None):
+        self.model = model
+        self.parent_field = parent_field
+        self.fields = list(fields)
+        self.created_counter = created_counter
+
+    def _prepare(self, item):
+        if not item.price:
+            item.price = item.product.price
+
+        return item
+
+    @staticmethod
+    def _merge(new_items, lines):
+        """
+        Adds each new item to the line of ``lines`` (by product and price) it repeats, returning the items
+        that make new lines.
+        """
+        to_create = []
+        for item in new_items:
+            line = lines.get((item.product_id, item.price))
+            if line is None:
+                lines[(item.product_id, item.price)] = item
+                to_create.append(item)
+            else:
+                line.quantity += item.quantity
+
+        return to_create
+
+    def _count(self, items):
+        units = sum(item.quantity for item in items)
+        if self.created_counter is not None and units:
+            transaction.on_commit(partial(self.created_counter.inc, amount=units))
+
+    def write(self, parent, items_data, replace=True):
+        queryset = self.model.objects.filter(**{self.parent_field: parent})
+        existing = {item.id: item for item in queryset} if replace else {}
+
+        errors = []
+        new_items = []
+        to_update = []
+        now = timezone.now()
+        for data in items_data:
+            data = dict(data)
+            item_id = data.pop("id", None)
+            if item_id is None or not replace:
+                new_items.append(self._prepare(self.model(**{self.parent_field: parent}, **data)))
+                continue
+
+            item = existing.get(item_id)
+            if item is None:
+                errors.append({"id": "Item does not exist."})
+                continue
+
+            for field, value in data.items():
+                setattr(item, field, value)
+            item.updated_at = now
+            to_update.append(self._prepare(item))
+
+        if errors:
+            raise serializers.ValidationError({"items": errors})
+
+        self._count(new_items)
+        to_create = self._merge(new_items, {(item.product_id, item.price): item for item in to_update})
+
+        if replace:
+            queryset.exclude(id__in=[item.id for item in to_update]).delete()
+        if to_update:
+            self.model.objects.bulk_update(to_update, self.fields + ["updated_at"])
+        if to_create:
+            self.model.objects.bulk_create(to_create)
+
+        return to_update + to_create
+
+    def add(self, parent, items_data):
+        """
+        Adds new items, leaving the other lines untouched: the lines they repeat get their quantity increased
+        with one ``bulk_update`` and the others are inserted with one ``bulk_create``. The parent row must be
+        locked by the caller, or concurrent additions of the same new product would insert two lines.
+        """
+        new_items = []
+        for data in items_data:
+            data = dict(data)
+            data.pop("id", None)
+            new_items.append(self._prepare(self.model(**{self.parent_field: parent}, **data)))
+        if not new_items:
+            return []
+
+        self._count(new_items)
+        merged = self._merge(new_items, {})
+        lines = self.model.objects.filter(
+            **{self.parent_field: parent},
+            product_id__in={item.product_id for item in merged},
+        )
+        repeated = {(line.product_id, line.price): line for line in lines}
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        for item in merged:
+            line = repeated.get((item.product_id, item.price))
+            if line is None:
+                to_create.append(item)
+                continue
+
+            to_update.append((line, line.quantity + item.quantity))
+            # Added in SQL, so concurrent additions to the same line are all kept.
+            line.quantity = F("quantity") + item.quantity
+            line.updated_at = now
+
+        if to_update:
+            self.model.objects.bulk_update([line for line, _ in to_update], ["quantity", "updated_at"])
+            for line, quantity in to_update:
+                line.quantity = quantity
+        if to_create:
+            self.model.objects.bulk_create(to_create)
+
+        return [line for line, _ in to_update] + to_create
+
+    def remove(self, parent, item_ids):
+        """Deletes the given items of the parent with one query, returning how many were deleted."""
+        if not item_ids:
+            return 0
+
+        return self.model.objects.filter(**{self.parent_field: parent}, id__in=item_ids).delete()[0]
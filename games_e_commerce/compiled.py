@@ -0,0 +1,175 @@
+import decimal
+
+from django.conf import settings
+from django.db import models
+from rest_framework import ISO_8601, fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+from games_e_commerce.instrumentation import timed
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str):
+            return value
+
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+
+        return value
+
+    return convert
+
+
+def _decimal_converter(field):
+    if field.decimal_places is None or field.localize:
+        return field.to_representation
+
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+
+        quantized = value.quantize(exponent, rounding=rounding, context=context)
+
+        return "{:f}".format(quantized) if coerce_to_string else quantized
+
+    return convert
+
+
+def _compile_field(field, model):
+    """Returns ``(getter, converter)`` for a readable field. A ``None`` converter means the value is used as is."""
+    source = field.source
+
+    if isinstance(field, serializers.SerializerMethodField):
+        method = getattr(field.parent, field.method_name)
+        return (lambda instance: instance), method
+
+    is_pk_field = isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None
+    if is_pk_field and model is not None and "." not in source:
+        attname = model._meta.get_field(source).attname
+        return (lambda instance: getattr(instance, attname)), None
+
+    if source == "*" or "." in source:
+        return field.get_attribute, field.to_representation
+
+    def getter(instance):
+        return getattr(instance, source)
+
+    if isinstance(field, serializers.ListSerializer):
+        child = compile_serializer(field.child)
+
+        def convert_many(value):
+            iterable = value.all() if isinstance(value, models.Manager) else value
+            return [child(item) for item in iterable]
+
+        return getter, convert_many
+
+    if isinstance(field, serializers.BaseSerializer):
+        return getter, compile_serializer(field)
+
+    if type(field) is drf_fields.IntegerField:
+        return getter, int
+
+    if type(field) is drf_fields.CharField:
+        return getter, str
+
+    if isinstance(field, drf_fields.DateTimeField):
+        return getter, _datetime_converter(field)
+
+    if isinstance(field, drf_fields.DecimalField):
+        return getter, _decimal_converter(field)
+
+    return getter, field.to_representation
+
+
+def compile_serializer(serializer):
+    """
+    Compiles a (bound) serializer instance into a plain ``instance -> dict`` function that produces
+    the same output as ``serializer.to_representation``, with the field lookups resolved once up front.
+    Serializers may define ``prepare_instance(instance)`` for work that must run before their fields are read.
+    """
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    compiled_fields = [
+        (field.field_name, *_compile_field(field, model))
+        for field in serializer._readable_fields
+    ]
+    prepare = getattr(serializer, "prepare_instance", None)
+
+    def to_representation(instance):
+        if prepare is not None:
+            prepare(instance)
+
+        data = {}
+        for name, getter, converter in compiled_fields:
+            try:
+                value = getter(instance)
+            except drf_fields.SkipField:
+                continue
+            if value is None or converter is None:
+                data[name] = value
+            else:
+                data[name] = converter(value)
+
+        return data
+
+    return to_representation
+
+
+class CompiledSerializer:
+    """Read-only stand-in for a serializer that renders ``instance`` with a compiled serializer."""
+
+    def __init__(self, serializer, instance, many=False):
+        self.serializer = serializer
+        self.instance = instance
+        self.many = many
+
+    def compile(self):
+        return compile_serializer(self.serializer)
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            to_representation = self.compile()
+            if self.many:
+                iterable = self.instance.all() if isinstance(self.instance, models.Manager) else self.instance
+                return [to_representation(item) for item in iterable]
+
+            return to_representation(self.instance)
+
+
+class CompiledSerializerViewMixin:
+    """
+    Serves the ``compiled_actions`` of a view (list and retrieve by default) through compiled serializers,
+    when the ``COMPILED_SERIALIZERS`` setting is on. Writes always go through the regular serializers.
+    """
+    compiled_actions = ("list", "retrieve")
+
+    def use_compiled_serializer(self):
+        enabled = getattr(settings, "COMPILED_SERIALIZERS", True)
+
+        return enabled and getattr(self, "action", None) in self.compiled_actions
+
+    def get_serializer(self, *args, **kwargs):
+        if not args or kwargs.get("data") is not None or not self.use_compiled_serializer():
+            return super().get_serializer(*args, **kwargs)
+
+        serializer_class = self.get_serializer_class()
+        kwargs.setdefault("context", self.get_serializer_context())
+
+        return CompiledSerializer(serializer_class(context=kwargs["context"]), args[0], many=kwargs.get("many", False))
@@ -0,0 +1,151 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_QUERY_PARAM = "fields"
+EXCLUDE_QUERY_PARAM = "exclude"
+
+
+def parse_fieldsets(value):
+    """
+    Parses ``"id,items.product.name"`` into the tree ``{"id": {}, "items": {"product": {"name": {}}}}``.
+    An empty subtree means the whole field.
+    """
+    tree = {}
+    for path in (value or "").split(","):
+        path = path.strip()
+        if not path:
+            continue
+
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+
+    return tree
+
+
+def get_request_fieldsets(request):
+    """Returns the ``(include, exclude)`` trees of a read request, or ``(None, None)`` when there are none."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+
+    include = parse_fieldsets(request.query_params.get(FIELDS_QUERY_PARAM)) or None
+    exclude = parse_fieldsets(request.query_params.get(EXCLUDE_QUERY_PARAM)) or None
+
+    return include, exclude
+
+
+def _nested_serializer(field):
+    field = field.child if isinstance(field, ListSerializer) else field
+
+    return field if isinstance(field, BaseSerializer) else None
+
+
+def prune_fields(fields, include=None, exclude=None):
+    """Removes the fields that are not included or are excluded from a serializer ``fields`` dict, recursively."""
+    if include:
+        for name in list(fields):
+            if name not in include:
+                fields.pop(name)
+
+    for name, field in list(fields.items()):
+        sub_include = (include or {}).get(name) or None
+        sub_exclude = (exclude or {}).get(name)
+        if sub_exclude == {}:
+            fields.pop(name)
+            continue
+
+        nested = _nested_serializer(field)
+        if nested is not None and (sub_include or sub_exclude):
+            prune_fields(nested.fields, sub_include, sub_exclude)
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin that lets read requests choose the output fields with ``?fields=`` and ``?exclude=``,
+    including nested paths such as ``items.product.name``. Only the root serializer reads the query params.
+    """
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self._is_root():
+            include, exclude = get_request_fieldsets(self.context.get("request"))
+            if include or exclude:
+                prune_fields(fields, include, exclude)
+
+        return fields
+
+
+def _get_model_field(model, name):
+    for relation in model._meta.related_objects:
+        if relation.get_accessor_name() == name:
+            return relation
+
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def get_projection(serializer, model):
+    """
+    Returns the ``(only, prefetches)`` needed to load what the (already pruned) serializer outputs:
+    the concrete columns of the model and one ``Prefetch`` with its own projection per nested relation.
+    Serializers can list columns they always need in ``projection_required``, and the columns read by
+    computed fields in ``projection_sources`` (``{field name: [columns]}``), needed only when the field is output.
+    """
+    only = {model._meta.pk.name, *getattr(serializer, "projection_required", ())}
+    for name, columns in getattr(serializer, "projection_sources", {}).items():
+        if name in serializer.fields:
+            only.update(columns)
+    prefetches = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        model_field = _get_model_field(model, field.source.split(".")[0])
+        if model_field is None:
+            continue
+
+        nested = _nested_serializer(field)
+        if nested is None or not model_field.is_relation:
+            if model_field.concrete:
+                only.add(model_field.name)
+            continue
+
+        related_only, related_prefetches = get_projection(nested, model_field.related_model)
+        if model_field.concrete:
+            only.add(model_field.name)
+        else:
+            related_only.add(model_field.field.name)
+
+        related_queryset = model_field.related_model.objects.only(*related_only).prefetch_related(*related_prefetches)
+        prefetches.append(Prefetch(field.source, queryset=related_queryset))
+
+    return only, prefetches
+
+
+class SparseFieldsetsViewMixin:
+    """
+    View mixin that pushes the requested fieldsets down into the queryset with ``only()`` and projected
+    ``Prefetch`` objects, so unrequested columns and relations are never fetched.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        include, exclude = get_request_fieldsets(getattr(self, "request", None))
+        if not (include or exclude):
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        only, prefetches = get_projection(serializer, queryset.model)
+
+        return queryset.only(*only).prefetch_related(None).prefetch_related(*prefetches)
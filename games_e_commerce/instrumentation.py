@@ -0,0 +1,159 @@
+import logging
+import random
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+NUMBER = re.compile(r"\b\d+\b")
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+def sql_shape(sql):
+    """Normalizes a statement so the same query with different parameters or ``IN`` list sizes compares equal."""
+    return NUMBER.sub("?", PLACEHOLDER_LIST.sub("(...)", sql))
+
+
+class RequestTimings:
+    """Query count, DB time and named timings of one request. Doubles as the connections' execute wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = {}
+        self.statements = []
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+            self.statements.append(sql)
+
+    def add(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def repeated_queries(self, limit=5):
+        """The most repeated statement shapes, as ``[(count, shape)]``; the usual signature of an N+1."""
+        counter = Counter(sql_shape(sql) for sql in self.statements)
+
+        return [(count, shape) for shape, count in counter.most_common(limit) if count > 1]
+
+    def server_timing(self, total):
+        metrics = ["db;dur={:.1f};desc=\"{} queries\"".format(self.db_time * 1000, self.queries)]
+        metrics += ["{};dur={:.1f}".format(name, duration * 1000) for name, duration in self.timings.items()]
+        metrics.append("total;dur={:.1f}".format(total * 1000))
+
+        return ", ".join(metrics)
+
+
+def current_timings():
+    return _current_timings.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time spent in the block to the ``name`` timing of the current request, if it is being measured.
+    A block nested in another one with the same name is only counted once, by the outer one.
+    """
+    timings = _current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+
+    timings.active.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        timings.add(name, perf_counter() - start)
+
+
+def time_serializers():
+    """Times the ``data`` of every DRF serializer as the ``serialize`` timing of the request. Runs once."""
+    data = BaseSerializer.data
+    if getattr(data.fget, "timed", False):
+        return
+
+    def timed_data(serializer):
+        with timed("serialize"):
+            return data.fget(serializer)
+
+    timed_data.timed = True
+    BaseSerializer.data = property(timed_data)
+
+
+class RequestTimingMiddleware:
+    """
+    Measures a sample of the requests (``REQUEST_TIMING_SAMPLE_RATE``): SQL queries and their time, serializer
+    time (of every DRF serializer, see ``time_serializers``) and render time. They are sent in a ``Server-Timing``
+    header when ``REQUEST_TIMING_HEADER`` is on (it follows ``DEBUG`` by default) and requests slower than
+    ``SLOW_REQUEST_MS`` or with more than ``SLOW_REQUEST_QUERIES`` queries are logged with their most repeated
+    queries.
+    Must be the first middleware so the whole request is measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        time_serializers()
+
+    def __call__(self, request):
+        if random.random() >= getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 1.0):
+            return self.get_response(request)
+
+        timings = request.timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        total = perf_counter() - start
+
+        if getattr(settings, "REQUEST_TIMING_HEADER", settings.DEBUG):
+            response["Server-Timing"] = timings.server_timing(total)
+        self.log_slow_request(request, response, timings, total)
+
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, "timings", None)
+        if timings is not None:
+            start = perf_counter()
+            response.add_post_render_callback(lambda rendered: timings.add("render", perf_counter() - start))
+
+        return response
+
+    def log_slow_request(self, request, response, timings, total):
+        slow = total * 1000 >= getattr(settings, "SLOW_REQUEST_MS", 500)
+        if not slow and timings.queries <= getattr(settings, "SLOW_REQUEST_QUERIES", 50):
+            return
+
+        repeated = "".join("\n  {} x {}".format(count, shape) for count, shape in timings.repeated_queries())
+        logger.warning(
+            "Slow request %s %s (%s): %.1fms, %d queries in %.1fms.%s",
+            request.method,
+            request.path,
+            response.status_code,
+            total * 1000,
+            timings.queries,
+            timings.db_time * 1000,
+            repeated,
+        )
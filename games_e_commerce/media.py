@@ -0,0 +1,144 @@
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from games_e_commerce.storage import content_hash
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive ``(start, end)`` of a single ``bytes=`` range, or ``None`` when there is no range
+    to honour (multiple ranges are answered with the whole file). Raises ``UnsatisfiableRange``.
+    """
+    match = BYTE_RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # A suffix range, the last ``end`` bytes.
+        if int(end) == 0:
+            raise UnsatisfiableRange()
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise UnsatisfiableRange()
+
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as media_file:
+        media_file.seek(start)
+        while length > 0:
+            chunk = media_file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def range_applies(request, etag, last_modified):
+    """A range is only honoured when ``If-Range`` is absent or still matches the file."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(("\"", "W/")):
+        return if_range == etag
+
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def file_response(request, path, size, content_type, etag, last_modified):
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = "bytes */{}".format(size)
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(read_range(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response["Content-Range"] = "bytes {}-{}/{}".format(start, end, size)
+            response["Content-Length"] = str(end - start + 1)
+            return response
+
+    return FileResponse(open(path, "rb"), content_type=content_type)
+
+
+def offload_response(path, name, content_type):
+    """
+    Hands the file over to the web server when it is configured to send media itself: nginx with
+    ``X-Accel-Redirect`` to an internal location, or Apache/lighttpd with ``X-Sendfile``.
+    """
+    prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+    header = getattr(settings, "MEDIA_SENDFILE_HEADER", None)
+    if not prefix and not header:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if prefix:
+        response["X-Accel-Redirect"] = "{}/{}".format(prefix.rstrip("/"), quote(name))
+    else:
+        response[header] = str(path)
+
+    return response
+
+
+def serve_media(request, path):
+    """
+    Serves an uploaded file. Content-hashed names are cached by clients and CDNs forever, other names for
+    ``MEDIA_CACHE_MAX_AGE`` seconds. Byte ranges and conditional requests are answered, and the transfer is
+    offloaded to the web server when ``MEDIA_ACCEL_REDIRECT_PREFIX`` or ``MEDIA_SENDFILE_HEADER`` is set.
+    """
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404()
+    if not full_path.is_file():
+        raise Http404()
+
+    stat = full_path.stat()
+    digest = content_hash(full_path.name)
+    etag = "\"{}\"".format(digest) if digest else "\"{:x}-{:x}\"".format(int(stat.st_mtime), stat.st_size)
+    content_type, encoding = mimetypes.guess_type(full_path.name)
+    content_type = content_type or "application/octet-stream"
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = offload_response(full_path, path, content_type)
+    if response is None:
+        response = file_response(request, full_path, stat.st_size, content_type, etag, stat.st_mtime)
+        response["Accept-Ranges"] = "bytes"
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if digest:
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response["Cache-Control"] = "public, max-age={}".format(getattr(settings, "MEDIA_CACHE_MAX_AGE", 3600))
+
+    return response
@@ -0,0 +1,294 @@
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else "{}.0".format(int(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+
+    return "{{{}}}".format(",".join("{}=\"{}\"".format(name, _escape(value)) for name, value in pairs))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError("{} expects the labels {}.".format(self.name, self.labelnames))
+
+        return json.dumps([str(label) for label in labels])
+
+    def labels(self, key):
+        return json.loads(key)
+
+    def merge(self, merged, values):
+        raise NotImplementedError()
+
+    def expose(self, values):
+        raise NotImplementedError()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def merge(self, merged, values):
+        for key, value in values.items():
+            merged[key] = merged.get(key, 0) + value
+
+    def expose(self, values):
+        for key, value in sorted(values.items()):
+            yield "{}{} {}".format(self.name, _labels(self.labelnames, self.labels(key)), _format_value(value))
+
+
+class Histogram(Metric):
+    """Stores the count of each bucket (not cumulative) followed by the sum of the observations."""
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def merge(self, merged, values):
+        for key, counts in values.items():
+            if len(counts) != len(self.buckets) + 2:
+                continue
+            if key in merged:
+                merged[key] = [total + count for total, count in zip(merged[key], counts)]
+            else:
+                merged[key] = list(counts)
+
+    def expose(self, values):
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, counts in sorted(values.items()):
+            labels = self.labels(key)
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "{}_bucket{} {}".format(
+                    self.name, _labels(self.labelnames, labels, [("le", bound)]), _format_value(cumulative)
+                )
+            yield "{}_sum{} {}".format(self.name, _labels(self.labelnames, labels), _format_value(counts[-1]))
+            yield "{}_count{} {}".format(self.name, _labels(self.labelnames, labels), _format_value(cumulative))
+
+
+class Registry:
+    """
+    Process-local metrics. With ``METRICS_DIR`` set, every process periodically writes its values to its own
+    file in that directory (at most every ``METRICS_FLUSH_INTERVAL`` seconds and at exit), and the exposition
+    sums the files of every process, past and present, so counters stay correct across gunicorn workers.
+    The directory should be emptied when the application is deployed.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.derived = []
+        self.reset()
+
+    def reset(self):
+        """Forgets the values of the process, e.g. in a forked worker, where they belong to the parent."""
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.path = None
+        self.flushed_at = 0.0
+        for metric in self.metrics.values():
+            metric.values = {}
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def derive(self, expose):
+        """Registers ``expose(values)``, yielding extra lines computed from the merged values at exposition."""
+        self.derived.append(expose)
+
+        return expose
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError("The metric {} is already registered.".format(metric.name))
+        self.metrics[metric.name] = metric
+
+        return metric
+
+    def snapshot(self):
+        with self.lock:
+            return {name: dict(metric.values) for name, metric in self.metrics.items()}
+
+    def flush(self):
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory or not self.flush_lock.acquire(blocking=False):
+            return
+
+        try:
+            snapshot = self.snapshot()
+            if self.path is None:
+                os.makedirs(directory, exist_ok=True)
+                self.path = os.path.join(directory, "metrics-{}-{}.json".format(os.getpid(), uuid.uuid4().hex[:8]))
+            temporary = "{}.tmp".format(self.path)
+            with open(temporary, "w") as metrics_file:
+                json.dump(snapshot, metrics_file)
+            os.replace(temporary, self.path)
+            self.flushed_at = monotonic()
+        finally:
+            self.flush_lock.release()
+
+    def maybe_flush(self):
+        if monotonic() - self.flushed_at >= getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+            self.flush()
+
+    def collect(self):
+        """The values of every metric, summed over every process."""
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return self.snapshot()
+
+        self.flush()
+        merged = {name: {} for name in self.metrics}
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path) as metrics_file:
+                    snapshot = json.load(metrics_file)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                if name in self.metrics:
+                    self.metrics[name].merge(merged[name], values)
+
+        return merged
+
+    def expose(self):
+        values = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append("# HELP {} {}".format(name, metric.documentation))
+            lines.append("# TYPE {} {}".format(name, metric.kind))
+            lines.extend(metric.expose(values[name]))
+        for expose in self.derived:
+            lines.extend(expose(values))
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush())
+os.register_at_fork(after_in_child=registry.reset)
+
+request_latency = registry.histogram(
+    "http_request_duration_seconds",
+    "Time spent handling the requests of each view.",
+    ["view", "method"],
+)
+requests_total = registry.counter("http_requests_total", "Requests handled by each view.", ["view", "method", "status"])
+request_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL queries run by the requests of each view.",
+    ["view"],
+    buckets=QUERY_BUCKETS,
+)
+
+
+def route_name(request):
+    """``ViewSet.action`` for DRF views (e.g. ``CartViewSet.get_cart``), the URL name or function otherwise."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return match.view_name or match.func.__name__
+
+    actions = getattr(match.func, "actions", None)
+    method = request.method.lower()
+
+    return "{}.{}".format(view_class.__name__, actions.get(method, method) if actions else method)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, status and SQL query count of every request per route, when ``METRICS`` is on.
+    The queries are the ones counted by ``RequestTimingMiddleware``, so they are only recorded for the requests
+    it samples.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "METRICS", True):
+            return self.get_response(request)
+
+        start = perf_counter()
+        response = self.get_response(request)
+        duration = perf_counter() - start
+
+        view = route_name(request)
+        request_latency.observe(duration, view, request.method)
+        requests_total.inc(view, request.method, response.status_code)
+        timings = getattr(request, "timings", None)
+        if timings is not None:
+            request_queries.observe(timings.queries, view)
+        registry.maybe_flush()
+
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition, protected by the ``METRICS_TOKEN`` bearer token. Without a token it is only
+    served with ``DEBUG`` on.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), "Bearer {}".format(token)):
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.expose(), content_type=CONTENT_TYPE)
@@ -0,0 +1,146 @@
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination over ``(ordering field, id)``.
+
+    Pages are read with an index friendly ``WHERE (field, id) > (value, id)`` condition instead of
+    ``OFFSET``, and the total count is only computed when the client asks for it with ``count=true``.
+    The ordering comes from the ``ordering`` query param when it is one of the view ``ordering_fields``,
+    otherwise from the view ``cursor_ordering`` (``"id"`` by default). Null values sort as the largest ones,
+    as Postgres and its indexes place them: last in ascending pages and first in descending pages.
+    """
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def get_ordering(self, request, view):
+        allowed = set(getattr(view, "ordering_fields", None) or [])
+        default = getattr(view, "cursor_ordering", "id")
+        allowed.add(default.lstrip("-"))
+
+        ordering = request.query_params.get(self.ordering_query_param, default).split(",")[0].strip()
+        if ordering.lstrip("-") not in allowed:
+            ordering = default
+
+        return ordering.lstrip("-"), ordering.startswith("-")
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field_name)
+        position = {
+            "v": None if value is None else str(value.isoformat() if hasattr(value, "isoformat") else value),
+            "i": instance.pk,
+            "r": reverse,
+        }
+        encoded = urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            value = position["v"]
+            if value is not None:
+                value = self.field.to_python(value)
+
+            return value, int(position["i"]), bool(position["r"])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, value, pk, descending):
+        """Condition for the rows that come after ``(value, pk)`` in the given direction, nulls being the largest."""
+        field = self.field_name
+        compare = "lt" if descending else "gt"
+        if value is None:
+            condition = Q(**{"{}__isnull".format(field): True, "pk__{}".format(compare): pk})
+            if descending:
+                condition |= Q(**{"{}__isnull".format(field): False})
+
+            return condition
+
+        condition = Q(**{"{}__{}".format(field, compare): value}) | Q(**{field: value, "pk__{}".format(compare): pk})
+        if self.field.null and not descending:
+            condition |= Q(**{"{}__isnull".format(field): True})
+
+        return condition
+
+    def _before(self, value, pk, descending):
+        """Condition for the rows that come before ``(value, pk)`` in the given direction."""
+        return self._after(value, pk, not descending)
+
+    def _order_by(self, descending, reverse):
+        # Walking backwards flips the direction. The nulls keep the Postgres placement (last ascending, first
+        # descending), which is the order of the ``(field, id)`` indexes, so both directions are index scans.
+        descending = descending != reverse
+
+        return ("-{}" if descending else "{}").format(self.field_name), "-pk" if descending else "pk"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.count_query_param)
+        self.field_name, descending = self.get_ordering(request, view)
+        try:
+            self.field = queryset.model._meta.get_field(self.field_name)
+        except FieldDoesNotExist:
+            self.field_name, descending = "id", False
+            self.field = queryset.model._meta.pk
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("1", "true"):
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[2])
+        if cursor:
+            value, pk, _ = cursor
+            condition = self._before(value, pk, descending) if reverse else self._after(value, pk, descending)
+            queryset = queryset.filter(condition)
+
+        rows = list(queryset.order_by(*self._order_by(descending, reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = rows[-1] if rows and (has_more or reverse) else None
+        self.previous_position = rows[0] if rows and (has_more or not reverse) and cursor else None
+        self.page = rows
+
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_data(self, data):
+        paginated = {"links": {"next": self.get_next_link(), "previous": self.get_previous_link()}}
+        if self.count is not None:
+            paginated["count"] = self.count
+            paginated["total_pages"] = math.ceil(self.count / self.page_size) if self.page_size else 0
+        paginated["results"] = data
+
+        return paginated
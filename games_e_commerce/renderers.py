@@ -0,0 +1,142 @@
+import json
+import secrets
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+class EncodedJSON(Mapping):
+    """
+    An already encoded JSON object, spliced as is into the rendered output (see ``dumps``).
+    It can still be read as a mapping, in which case the bytes are decoded once, on first access.
+    """
+    __slots__ = ("encoded", "_decoded")
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+        self._decoded = None
+
+    @property
+    def decoded(self):
+        if self._decoded is None:
+            self._decoded = orjson.loads(self.encoded) if orjson is not None else json.loads(self.encoded)
+
+        return self._decoded
+
+    def __getitem__(self, key):
+        return self.decoded[key]
+
+    def __iter__(self):
+        return iter(self.decoded)
+
+    def __len__(self):
+        return len(self.decoded)
+
+    def __repr__(self):
+        return "EncodedJSON({!r})".format(self.encoded)
+
+    def __getstate__(self):
+        return self.encoded
+
+    def __setstate__(self, state):
+        self.encoded = state
+        self._decoded = None
+
+
+def _splice(encoded, marker, fragments):
+    """Replaces every ``"<marker><index>"`` string of the output with the bytes of the fragment at that index."""
+    head, *parts = encoded.split(b'"' + marker)
+    chunks = [head]
+    for part in parts:
+        index, rest = part.split(b'"', 1)
+        chunks.append(fragments[int(index)])
+        chunks.append(rest)
+
+    return b"".join(chunks)
+
+
+def dumps(data, indent=None, ensure_ascii=False, compact=True, allow_nan=False):
+    """
+    Encodes ``data`` to JSON bytes with the same output as DRF's ``JSONRenderer``, using ``orjson``
+    when it is installed and the output is compact UTF-8, and the standard library otherwise.
+    ``EncodedJSON`` values found in the data are written verbatim.
+    """
+    fragments = []
+    marker = secrets.token_hex(8)
+
+    def default(obj):
+        if isinstance(obj, EncodedJSON):
+            fragments.append(obj.encoded)
+            return "{}{}".format(marker, len(fragments) - 1)
+
+        return _encoder.default(obj)
+
+    if orjson is not None and indent is None and compact and not ensure_ascii:
+        encoded = orjson.dumps(data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+    else:
+        if indent is not None:
+            separators = (",", ": ")
+        else:
+            separators = (",", ":") if compact else (", ", ": ")
+        encoded = json.dumps(
+            data,
+            default=default,
+            indent=indent,
+            ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan,
+            separators=separators,
+        ).encode()
+
+    if fragments:
+        encoded = _splice(encoded, marker.encode(), fragments)
+
+    # Like DRF, fully escape \u2028 and \u2029 so the output is a strict javascript subset.
+    if b"\xe2\x80\xa8" in encoded or b"\xe2\x80\xa9" in encoded:
+        encoded = encoded.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+    return encoded
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` backed by ``orjson`` when available, that also renders ``EncodedJSON`` fragments."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+
+        return dumps(
+            data,
+            indent=indent,
+            ensure_ascii=self.ensure_ascii,
+            compact=self.compact,
+            allow_nan=not self.strict,
+        )
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` backed by ``orjson`` when available."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - {}".format(exc))
@@ -29,7 +29,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = env("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = env("DEBUG")
+DEBUG = env.bool("DEBUG")
 
 ALLOWED_HOSTS = []
 
@@ -60,6 +60,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = LOCAL_APPS + EXTERNAL_APPS + DEFAULT_APPS
 
 MIDDLEWARE = [
+    'games_e_commerce.instrumentation.RequestTimingMiddleware',
+    'games_e_commerce.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,6 +107,16 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=300)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -141,8 +153,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
-MEDIA_URL = os.path.join(BASE_DIR, 'media/')
-MEDIA_ROOT = "media"
+MEDIA_URL = env("MEDIA_URL", default="/media/")
+MEDIA_ROOT = env("MEDIA_ROOT", default=os.path.join(BASE_DIR, "media"))
+
+DEFAULT_FILE_STORAGE = "games_e_commerce.storage.HashedFileSystemStorage"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -151,16 +165,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "games_e_commerce.utils.FilterPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "games_e_commerce.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "games_e_commerce.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "PAGE_SIZE": 100,
     "DATE_FORMAT": "%d/%m/%Y",
     "DATE_INPUT_FORMATS": ["%d/%m/%Y", "%d-%m-%Y", "%d-%m-%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S"],
 }
 
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.authentication.VersionedTokenObtainPairSerializer",
+}
+
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", default=60)
+AUTH_USER_LOCAL_TIMEOUT = env.int("AUTH_USER_LOCAL_TIMEOUT", default=5)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Games E-Commerce",
     "DESCRIPTION": "This a games e-commerce application",
@@ -169,4 +199,34 @@ SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
 
+MAX_PAGE_SIZE = env.int("MAX_PAGE_SIZE", default=1000)
+
+STREAMING_MAX_PAGE_SIZE = env.int("STREAMING_MAX_PAGE_SIZE", default=100000)
+
+COMPILED_SERIALIZERS = env.bool("COMPILED_SERIALIZERS", default=True)
+
+FRAGMENT_CACHE = env.bool("FRAGMENT_CACHE", default=True)
+
+IMAGE_VARIANTS = env.bool("IMAGE_VARIANTS", default=True)
+IMAGE_VARIANT_WIDTHS = env.list("IMAGE_VARIANT_WIDTHS", cast=int, default=[160, 320, 640])
+IMAGE_VARIANT_FORMATS = env.list("IMAGE_VARIANT_FORMATS", default=["webp", "jpeg"])
+IMAGE_VARIANT_QUALITY = env.int("IMAGE_VARIANT_QUALITY", default=80)
+IMAGE_WORKERS = env.int("IMAGE_WORKERS", default=None)
+IMAGE_VARIANTS_IN_BACKGROUND = env.bool("IMAGE_VARIANTS_IN_BACKGROUND", default=True)
+
+SERVE_MEDIA = env.bool("SERVE_MEDIA", default=env.bool("DEBUG"))
+MEDIA_CACHE_MAX_AGE = env.int("MEDIA_CACHE_MAX_AGE", default=3600)
+MEDIA_ACCEL_REDIRECT_PREFIX = env("MEDIA_ACCEL_REDIRECT_PREFIX", default=None)
+MEDIA_SENDFILE_HEADER = env("MEDIA_SENDFILE_HEADER", default=None)
+
+REQUEST_TIMING_SAMPLE_RATE = env.float("REQUEST_TIMING_SAMPLE_RATE", default=1.0)
+REQUEST_TIMING_HEADER = env.bool("REQUEST_TIMING_HEADER", default=env.bool("DEBUG"))
+SLOW_REQUEST_MS = env.int("SLOW_REQUEST_MS", default=500)
+SLOW_REQUEST_QUERIES = env.int("SLOW_REQUEST_QUERIES", default=50)
+
+METRICS = env.bool("METRICS", default=True)
+METRICS_DIR = env("METRICS_DIR", default=None)
+METRICS_FLUSH_INTERVAL = env.int("METRICS_FLUSH_INTERVAL", default=5)
+METRICS_TOKEN = env("METRICS_TOKEN", default=None)
+
 FREIGHT_PRICE = env("FREIGHT_PRICE")
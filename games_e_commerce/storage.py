@@ -0,0 +1,59 @@
+import hashlib
+import os
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 16
+HASHED_NAME = re.compile(r"\.([0-9a-f]{%d})\.[^./]+$" % HASH_LENGTH)
+
+
+def content_hash(name):
+    """Returns the content hash of a name stored by ``HashedFileSystemStorage``, or ``None``."""
+    match = HASHED_NAME.search(name)
+
+    return match.group(1) if match else None
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    Stores files under a name with a hash of their content, e.g. ``images/fifa-18.3f2a9c0d1b4e5f67.png``.
+    A stored name never changes content, so it can be cached forever, and identical uploads are stored once.
+    """
+
+    def hashed_name(self, name, content, max_length=None):
+        """
+        The name with the content hash before its extension. Names over ``max_length`` lose the end of their
+        stem, never the hash, which must stay in the name for it to be cached as immutable.
+        """
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        directory, base = os.path.split(name)
+        stem, extension = os.path.splitext(base)
+        suffix = ".{}{}".format(hasher.hexdigest()[:HASH_LENGTH], extension)
+
+        if max_length is not None:
+            overflow = len(os.path.join(directory, stem + suffix)) - max_length
+            if overflow >= len(stem):
+                raise SuspiciousFileOperation(
+                    "Storage can not fit the content hash of \"{}\" in {} characters.".format(name, max_length)
+                )
+            if overflow > 0:
+                stem = stem[:-overflow]
+
+        return os.path.join(directory, stem + suffix)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content, max_length)
+        if self.exists(name):
+            return name
+
+        return super().save(name, content, max_length=max_length)
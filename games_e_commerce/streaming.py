@@ -0,0 +1,147 @@
+import secrets
+import zlib
+from itertools import islice
+
+from django.db.models.fields.files import FieldFile
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from games_e_commerce.renderers import dumps
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def release_instances(instances, seen=None):
+    """
+    Breaks the reference cycles Django leaves between model instances, through cached ``FieldFile`` objects
+    and prefetched reverse relations, so that a streamed chunk is freed by reference counting as soon as it
+    has been written instead of piling up until the next full garbage collection.
+    """
+    seen = set() if seen is None else seen
+    for instance in instances:
+        if id(instance) in seen:
+            continue
+        seen.add(id(instance))
+
+        for name, value in list(instance.__dict__.items()):
+            if isinstance(value, FieldFile):
+                del instance.__dict__[name]
+
+        prefetched = instance.__dict__.pop("_prefetched_objects_cache", {})
+        for queryset in prefetched.values():
+            release_instances(queryset._result_cache or (), seen)
+        release_instances([value for value in instance._state.fields_cache.values() if value is not None], seen)
+
+
+def iterate_chunks(queryset, chunk_size):
+    """
+    Reads the queryset with a server side cursor, yielding lists of ``chunk_size`` instances (with their
+    prefetches). Each chunk is released once the consumer asks for the next one.
+    """
+    for chunk in chunked(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        yield chunk
+        release_instances(chunk)
+
+
+def gzip_stream(chunks, level=6):
+    """Compresses a stream of bytes chunks on the fly into a gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header accepts gzip: ``gzip`` (or ``*`` when gzip is not listed)
+    with a non zero ``q`` value.
+    """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+
+    return False
+
+
+def streaming_response(request, chunks, content_type, filename=None):
+    """Builds a ``StreamingHttpResponse``, gzipped on the fly when the client accepts it."""
+    gzipped = accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    response = StreamingHttpResponse(gzip_stream(chunks) if gzipped else chunks, content_type=content_type)
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if filename:
+        response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
+
+    return response
+
+
+class StreamingListMixin:
+    """
+    Streams the list response when the client asks for ``stream=true``. The page is read with a server side
+    cursor in chunks of ``streaming_chunk_size`` rows (prefetches included), and each chunk is serialized and
+    encoded on its own into the usual paginated envelope, so memory stays flat whatever the ``page_size``.
+    """
+    streaming_chunk_size = 500
+
+    def is_streaming_request(self, request):
+        paginator = self.paginator
+
+        return (
+            paginator is not None
+            and hasattr(paginator, "is_streaming_request")
+            and paginator.is_streaming_request(request)
+            and isinstance(getattr(request, "accepted_renderer", None), JSONRenderer)
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming_request(request):
+            return super().list(request, *args, **kwargs)
+
+        self.paginator.streaming = True
+        queryset = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+
+        # The envelope is rendered once around a marker, which is then replaced by the streamed results.
+        marker = secrets.token_hex(8)
+        envelope = dumps(self.get_paginated_response(marker).data)
+        head, tail = envelope.split('"{}"'.format(marker).encode(), 1)
+
+        return StreamingHttpResponse(
+            self.stream_results(queryset, head, tail),
+            content_type=request.accepted_renderer.media_type,
+        )
+
+    def stream_results(self, queryset, head, tail):
+        yield head + b"["
+
+        separator = b""
+        for chunk in iterate_chunks(queryset, self.streaming_chunk_size):
+            data = self.get_serializer(chunk, many=True).data
+            yield separator + b",".join(dumps(item) for item in data)
+            separator = b","
+
+        yield b"]" + tail
@@ -13,18 +13,30 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+from urllib.parse import urlparse
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from games_e_commerce.media import serve_media
+from games_e_commerce.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("authentication/", include("authentication.urls")),
     path("commercial/", include("commercial.urls")),
 
+    path("metrics", metrics_view, name="metrics"),
+
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     # Optional UI:
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+# Media is served by the application only with SERVE_MEDIA (on with DEBUG by default) and when MEDIA_URL is local to
+# it, and can still be offloaded to the web server.
+if settings.SERVE_MEDIA and not urlparse(settings.MEDIA_URL).netloc:
+    urlpatterns.append(re_path(r"^{}(?P<path>.+)$".format(re.escape(settings.MEDIA_URL.lstrip("/"))), serve_media))
@@ -1,12 +1,90 @@
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from games_e_commerce.pagination import KeysetPagination
+
 
 class FilterPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset mode, selected with ``pagination=cursor``
+    or by following a ``cursor`` link. ``page_size`` is capped by the ``MAX_PAGE_SIZE`` setting,
+    or by ``STREAMING_MAX_PAGE_SIZE`` for the pages streamed by ``StreamingListMixin``.
+    """
     page_size = 100
     page_size_query_param = "page_size"
+    mode_query_param = "pagination"
+    stream_query_param = "stream"
+    keyset = None
+    # Set by ``StreamingListMixin`` when the page is going to be streamed.
+    streaming = False
+
+    @property
+    def max_page_size(self):
+        if self.streaming:
+            return getattr(settings, "STREAMING_MAX_PAGE_SIZE", 100000)
+
+        return getattr(settings, "MAX_PAGE_SIZE", 1000)
+
+    def is_streaming_request(self, request):
+        """Streaming is opt-in with ``stream=true`` and only applies to page number pagination."""
+        return (
+            request.query_params.get(self.stream_query_param, "").lower() in ("1", "true")
+            and not self.is_keyset_request(request)
+        )
+
+    def is_keyset_request(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_keyset_request(request):
+            self.keyset = KeysetPagination(self.get_page_size(request))
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if self.streaming:
+            return self.paginate_queryset_lazily(queryset, request)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_queryset_lazily(self, queryset, request):
+        """Returns the page as an unevaluated queryset; the only query run here is the ``COUNT``."""
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        return self.page.object_list
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        extra = [
+            (self.mode_query_param, "Set to `cursor` to use keyset pagination instead of page numbers."),
+            (KeysetPagination.cursor_query_param, "The pagination cursor value."),
+            (KeysetPagination.count_query_param, "Set to `true` to include the count in cursor mode."),
+            (self.stream_query_param, "Set to `true` to stream the page, allowing larger page sizes."),
+        ]
+
+        return parameters + [
+            {"name": name, "required": False, "in": "query", "description": description, "schema": {"type": "string"}}
+            for name, description in extra
+        ]
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return Response(self.keyset.get_paginated_data(data))
+
         return Response(
             {
                 "links": {"next": self.get_next_link(), "previous": self.get_previous_link()},
@@ -14,4 +92,73 @@ class FilterPagination(PageNumberPagination):
                 "total_pages": self.page.paginator.num_pages,
                 "results": data,
             }
-        )
\ No newline at end of file
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match``/``If-Modified-Since`` requests with ``304 Not Modified`` before
+    anything is serialized. The validator comes from one aggregate query with the row count and
+    ``max(updated_at)`` of the queryset and of the related paths in ``conditional_related``.
+
+    ``Last-Modified`` is only sent for single objects: the ``max(updated_at)`` of a list does not change when
+    one of its rows is deleted, so lists are only validated by their ``ETag``, which includes the row count.
+    """
+    conditional_related = ()
+
+    def get_conditional_validator(self, queryset, related=None):
+        related = self.conditional_related if related is None else related
+
+        aggregates = {"count": Count("pk", distinct=True), "updated_at": Max("updated_at")}
+        for path in related:
+            aggregates["{}_count".format(path)] = Count(path, distinct=True)
+            aggregates["{}_updated_at".format(path)] = Max("{}__updated_at".format(path))
+        values = queryset.order_by().aggregate(**aggregates)
+
+        timestamps = [value for key, value in values.items() if key.endswith("updated_at") and value]
+        last_modified = max(timestamps) if timestamps else None
+        digest = hashlib.md5(
+            repr((self.request.get_full_path(), sorted(values.items()))).encode()
+        ).hexdigest()
+
+        return quote_etag(digest), last_modified
+
+    def conditional_response(self, request, queryset, handler, related=None, single=True):
+        etag, last_modified = self.get_conditional_validator(queryset, related)
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified and single else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler()
+        if 200 <= response.status_code < 300:
+            response["ETag"] = etag
+            if last_modified_timestamp is not None:
+                response["Last-Modified"] = http_date(last_modified_timestamp)
+
+        return response
+
+
+class ConditionalListRetrieveMixin(ConditionalGetMixin):
+    """Applies the conditional GET handling of ``ConditionalGetMixin`` to the list and retrieve actions."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(ConditionalListRetrieveMixin, self).list(request, *args, **kwargs),
+            single=False,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        return self.conditional_response(
+            request,
+            queryset,
+            lambda: super(ConditionalListRetrieveMixin, self).retrieve(request, *args, **kwargs),
+        )